@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Sync Benchmark for Om Handicraft
+
+Runs the real OmHandicraftSync against the offline server in fake_google.py
+for several catalog sizes and reports wall time, API calls per endpoint,
+bytes served and peak memory of each run. Every sync runs in a fresh Python
+process in its own temporary website folder, so cold start cost is included
+and the repository's data/ and images/ are left alone.
+
+Usage:
+    python benchmark_sync.py
+    python benchmark_sync.py --sizes 10 1000 --latency 0.02 --error-rate 0.01
+    python benchmark_sync.py --sizes 1000 --quota 100
+    python benchmark_sync.py --output bench.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+from fake_google import FakeCatalog, FakeGoogleServer, FAKE_SHEET_ID, FAKE_FOLDER_ID
+
+DEFAULT_SIZES = [10, 1000, 50000]
+
+# Files a sync reads from the website folder
+SITE_FILES = ['index.html', 'config.json']
+
+
+def run_sync_child(website_path: str):
+    """Run one sync in this process and print its result as JSON (used by the parent)"""
+    import resource
+    from sync_website import OmHandicraftSync
+
+    started = time.perf_counter()
+    status = OmHandicraftSync(Path(website_path)).sync_website()
+    seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        'status': status,
+        'sync_seconds': seconds,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def prepare_website(website_path: Path, args: argparse.Namespace):
+    """Copy the files a sync needs and point config.json at the fake server's ids"""
+    repo_path = Path(__file__).parent
+    for name in SITE_FILES:
+        shutil.copy(repo_path / name, website_path / name)
+
+    config_path = website_path / 'config.json'
+    config = json.loads(config_path.read_text(encoding='utf-8'))
+    config['google'] = {'sheet_id': FAKE_SHEET_ID, 'drive_folder_id': FAKE_FOLDER_ID}
+    sync_config = config.setdefault('sync', {})
+    sync_config.setdefault('responsive_images', {})['enabled'] = args.variants
+    if args.workers:
+        sync_config['image_workers'] = args.workers
+    config_path.write_text(json.dumps(config, indent=2), encoding='utf-8')
+
+
+def benchmark(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Sync a catalog of the given size once and collect the measurements"""
+    print(f"\n⏱️  Benchmarking {size} products...")
+    catalog = FakeCatalog(size, args.seed)
+    server = FakeGoogleServer(catalog, latency=args.latency, error_rate=args.error_rate, seed=args.seed,
+                              quota_per_second=args.quota)
+    server.start()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='omhandicraft-bench-') as tmp:
+            website_path = Path(tmp)
+            prepare_website(website_path, args)
+
+            env = dict(os.environ, GOOGLE_API_ENDPOINT=server.endpoint, SYNC_FORCE='1')
+            env.pop('GITHUB_ACTIONS', None)
+            env.pop('GITHUB_OUTPUT', None)
+
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), '--run-sync', str(website_path)],
+                capture_output=True, text=True, env=env, cwd=website_path
+            )
+            wall_seconds = time.perf_counter() - started
+
+            if result.returncode != 0:
+                print(f"❌ Sync process failed:\n{result.stderr[-2000:]}")
+                child = {'status': 'crashed'}
+            else:
+                child = json.loads(result.stdout.strip().splitlines()[-1])
+
+            # Per-stage timings written by the sync itself
+            try:
+                report = json.loads((website_path / 'data' / 'sync_report.json').read_text(encoding='utf-8'))
+                child['stages'] = report['stages']
+            except (OSError, ValueError, KeyError):
+                pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    stats = server.stats()
+    run = dict(child, products=size, wall_seconds=wall_seconds, **stats)
+    print(f"   {run['status']} in {wall_seconds:.2f}s, {stats['total_calls']} API calls, "
+          f"peak RSS {run.get('peak_rss_mib', 0):.0f} MiB")
+    return run
+
+
+def print_summary(runs: List[Dict[str, Any]]):
+    """Print one row per catalog size"""
+    print("\n📊 Sync benchmark")
+    print(f"{'products':>9} {'status':>9} {'wall s':>8} {'calls':>7} {'MiB sent':>9} {'peak RSS MiB':>13}")
+    for run in runs:
+        print(f"{run['products']:>9} {run['status']:>9} {run['wall_seconds']:>8.2f} {run['total_calls']:>7} "
+              f"{run['bytes_sent'] / 2 ** 20:>9.1f} {run.get('peak_rss_mib', 0):>13.0f}")
+
+    for run in runs:
+        calls = ', '.join(f"{name}={count}" for name, count in sorted(run['calls'].items()))
+        print(f"   {run['products']} products: {calls}")
+        if run.get('stages'):
+            stages = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in run['stages'].items())
+            print(f"      stages: {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync_website.py against the fake Google server")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="catalog sizes to run")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every API request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of API requests failing with 503")
+    parser.add_argument('--quota', type=float, default=0.0,
+                        help="fake per-API quota in requests per second (0 = unlimited)")
+    parser.add_argument('--workers', type=int, help="override sync.image_workers")
+    parser.add_argument('--variants', action='store_true', help="also build responsive image variants")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--run-sync', metavar='WEBSITE_PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_sync:
+        run_sync_child(args.run_sync)
+        return
+
+    runs = [benchmark(size, args) for size in args.sizes]
+    print_summary(runs)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'latency': args.latency, 'error_rate': args.error_rate, 'quota': args.quota,
+                       'runs': runs}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Builder for Om Handicraft
+
+Generates resized WebP/AVIF/JPEG variants of the product images downloaded by
+sync_website.py so the website can serve a thumbnail-sized file through
+srcset instead of the original upload. Used by sync_website.py after the
+image download stage.
+
+Requirements:
+    - Pillow (AVIF output needs a Pillow build with AVIF support)
+"""
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Set, Callable
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when config.json has no sync.responsive_images section
+DEFAULT_WIDTHS = [320, 640, 960]
+DEFAULT_FORMATS = ['avif', 'webp', 'jpeg']
+DEFAULT_QUALITY = 80
+
+# Output details per format: Pillow format name, file extension, MIME type
+FORMATS = {
+    'avif': ('AVIF', '.avif', 'image/avif'),
+    'webp': ('WEBP', '.webp', 'image/webp'),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+}
+
+# Variants are written to images/<VARIANTS_DIR>/
+VARIANTS_DIR = 'variants'
+
+
+def supported_formats(formats: List[str]) -> List[str]:
+    """Return the requested formats that the installed Pillow can encode"""
+    from PIL import Image
+    Image.init()
+
+    supported = []
+    for fmt in formats:
+        if fmt not in FORMATS:
+            logger.warning(f"Unknown image format '{fmt}' in config, skipping")
+        elif FORMATS[fmt][0] not in Image.SAVE:
+            logger.warning(f"Pillow cannot encode {fmt.upper()}, skipping those variants")
+        else:
+            supported.append(fmt)
+    return supported
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in fixed-size chunks"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def generate_variants(source: str, output_dir: str, widths: List[int],
+                      formats: List[str], quality: int) -> List[Dict[str, Any]]:
+    """Resize one source image into every width/format combination.
+
+    Runs in a worker process, so it only takes and returns plain values.
+    Widths larger than the source are replaced by the source width so
+    images are never upscaled.
+    """
+    from PIL import Image, ImageOps
+
+    source_path = Path(source)
+    variants = []
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        targets = [width for width in sorted(set(widths)) if width < image.width]
+        if image.width < max(widths):
+            # Smaller than the largest requested width: also offer it at full size
+            targets.append(image.width)
+
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+
+            for fmt in formats:
+                pil_format, extension, mime_type = FORMATS[fmt]
+                frame = resized
+                if pil_format == 'JPEG' and frame.mode not in ('RGB', 'L'):
+                    frame = frame.convert('RGB')
+
+                name = f"{source_path.stem}-{width}w{extension}"
+                tmp_path = Path(output_dir) / f".{name}.part"
+                frame.save(tmp_path, pil_format, quality=quality)
+                os.replace(tmp_path, Path(output_dir) / name)
+
+                variants.append({
+                    'src': f"{VARIANTS_DIR}/{name}",
+                    'width': width,
+                    'type': mime_type
+                })
+    return variants
+
+
+class ImageVariantBuilder:
+    """Builds and tracks responsive variants for the images/ folder"""
+
+    def __init__(self, images_path: Path, manifest_path: Path, write_json: Callable[[Path, Any], Any],
+                 options: Dict[str, Any] = None):
+        """write_json(path, data) saves the manifest; sync_website.py passes its atomic,
+        write-only-on-change writer, so a crash never leaves a half-written manifest.
+        """
+        options = options or {}
+        self.images_path = images_path
+        self.variants_path = images_path / VARIANTS_DIR
+        self.manifest_path = manifest_path
+        self.widths = options.get('widths', DEFAULT_WIDTHS)
+        self.formats = options.get('formats', DEFAULT_FORMATS)
+        self.quality = options.get('quality', DEFAULT_QUALITY)
+        self.workers = options.get('workers') or os.cpu_count() or 1
+        self.write_json = write_json
+
+        # Source image name -> {'source_sha256', 'options', 'variants'}
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the variant manifest written by the previous build"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not load variant manifest, rebuilding all variants: {e}")
+            return {}
+
+    def save_manifest(self):
+        """Write the variant manifest"""
+        try:
+            self.write_json(self.manifest_path, self.manifest)
+        except Exception as e:
+            logger.error(f"Error saving variant manifest: {e}")
+
+    def build(self, image_names: List[str], trusted: Set[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Build variants for the given source images, reusing unchanged ones.
+
+        Sources are hashed to detect changes, except those named in trusted:
+        the caller already knows they are unchanged since the last build
+        (from their Drive checksum), so their manifest entry is reused as long
+        as the options match and the variant files exist.
+
+        Returns a mapping of source image name to its list of variants.
+        """
+        trusted = trusted or set()
+        try:
+            formats = supported_formats(self.formats)
+        except ImportError:
+            logger.warning("Pillow not installed, skipping responsive image variants")
+            return {}
+
+        if not formats:
+            return {}
+
+        self.variants_path.mkdir(exist_ok=True)
+        options = {'widths': sorted(self.widths), 'formats': formats, 'quality': self.quality}
+
+        pending = {}
+        for name in sorted(set(image_names)):
+            source = self.images_path / name
+            if not source.is_file():
+                continue
+            cached = self.manifest.get(name)
+            source_sha256 = None if cached and name in trusted else file_sha256(source)
+            if (cached and (source_sha256 is None or cached.get('source_sha256') == source_sha256)
+                    and cached.get('options') == options
+                    and all((self.images_path / v['src']).exists() for v in cached['variants'])):
+                continue
+            pending[name] = source_sha256 or file_sha256(source)
+
+        if pending:
+            workers = max(1, min(self.workers, len(pending)))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    name: executor.submit(generate_variants, str(self.images_path / name),
+                                          str(self.variants_path), options['widths'],
+                                          formats, self.quality)
+                    for name in pending
+                }
+                for name, future in futures.items():
+                    try:
+                        self.manifest[name] = {
+                            'source_sha256': pending[name],
+                            'options': options,
+                            'variants': future.result()
+                        }
+                    except Exception as e:
+                        logger.error(f"Error building variants for {name}: {e}")
+                        self.manifest.pop(name, None)
+            logger.info(f"Built variants for {len(pending)} images using {workers} processes")
+        else:
+            logger.info("All responsive image variants are up to date")
+
+        self.prune(image_names)
+        self.save_manifest()
+
+        wanted = set(image_names)
+        return {
+            name: entry['variants'] for name, entry in self.manifest.items()
+            if name in wanted
+        }
+
+    def prune(self, image_names: List[str]):
+        """Forget sources that are gone and delete variant files nobody references"""
+        keep = set(image_names)
+        for name in list(self.manifest):
+            if name not in keep:
+                del self.manifest[name]
+
+        referenced = {
+            Path(variant['src']).name
+            for entry in self.manifest.values()
+            for variant in entry['variants']
+        }
+        for path in self.variants_path.iterdir():
+            if path.is_file() and path.name not in referenced:
+                path.unlink()
+
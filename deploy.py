@@ -5,22 +5,43 @@ Deployment Script for Om Handicraft
 This script helps deploy the website and set up automation.
 """
 
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import json
 import os
+import re
 import shutil
 import subprocess
 import sys
 from pathlib import Path
 
+# Text assets that are minified and precompressed in optimized packages
+OPTIMIZED_SUFFIXES = {'.html', '.js', '.json'}
+
+# Files the service worker downloads at install time. Category shards and
+# the search index are only fetched when needed (and then cached at runtime),
+# so a first visit does not download the whole catalog
+SERVICE_WORKER_PRECACHE = ['index.html', 'script.js', 'data/catalog.json']
+
+# Blocks whose contents must not have their whitespace collapsed
+RAW_HTML_BLOCK = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+
 def check_dependencies():
     """Check if required dependencies are installed"""
     print("🔍 Checking dependencies...")
     
+    # find_spec only locates the packages, so this check stays fast
     try:
-        import google.auth
-        import googleapiclient
+        installed = all(importlib.util.find_spec(name) for name in ('google.auth', 'googleapiclient'))
+    except ImportError:
+        installed = False
+    
+    if installed:
         print("✅ Google API libraries installed")
         return True
-    except ImportError:
+    else:
         print("❌ Google API libraries not installed")
         print("💡 Run: pip install -r requirements.txt")
         return False
@@ -43,7 +64,106 @@ def run_sync():
         print(f"❌ Error running sync: {e}")
         return False
 
-def create_deployment_package():
+def minify_js(text):
+    """Minify JavaScript with rjsmin, or return it unchanged if unavailable"""
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text)
+
+def minify_html(text):
+    """Strip comments and collapse whitespace outside script/style/pre/textarea"""
+    parts = RAW_HTML_BLOCK.split(text)
+    minified = []
+    # split() yields text, whole block, tag name, text, ...
+    for index in range(0, len(parts), 3):
+        chunk = re.sub(r'<!--(?!\[if).*?-->', '', parts[index], flags=re.DOTALL)
+        minified.append(re.sub(r'\s+', ' ', chunk))
+        if index + 1 < len(parts):
+            block, tag = parts[index + 1], parts[index + 2].lower()
+            if tag == 'script':
+                open_tag, body = block.split('>', 1)
+                body, close_tag = body.rsplit('<', 1)
+                block = f"{open_tag}>{minify_js(body)}<{close_tag}"
+            minified.append(block)
+    return ''.join(minified).strip()
+
+def minify_asset(path):
+    """Return the minified contents of a text asset"""
+    text = path.read_text(encoding='utf-8')
+    if path.suffix == '.json':
+        return json.dumps(json.loads(text), separators=(',', ':'), ensure_ascii=False)
+    if path.suffix == '.js':
+        return minify_js(text)
+    return minify_html(text)
+
+def optimize_deployment_package(deployment_dir):
+    """Minify text assets and write .gz/.br siblings for static hosting"""
+    print("\n🗜️  Optimizing deployment package...")
+    
+    try:
+        import rjsmin  # noqa: F401
+    except ImportError:
+        print("⚠️  rjsmin not installed - JavaScript will not be minified")
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("⚠️  Brotli not installed - skipping .br files")
+    
+    totals = {'original': 0, 'minified': 0, 'gzip': 0, 'brotli': 0}
+    for path in sorted(deployment_dir.rglob('*')):
+        if not path.is_file() or path.suffix not in OPTIMIZED_SUFFIXES:
+            continue
+        
+        totals['original'] += path.stat().st_size
+        data = minify_asset(path).encode('utf-8')
+        path.write_bytes(data)
+        totals['minified'] += len(data)
+        
+        # mtime=0 keeps the .gz output identical for identical input
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        path.with_name(path.name + '.gz').write_bytes(gzipped)
+        totals['gzip'] += len(gzipped)
+        
+        if brotli:
+            compressed = brotli.compress(data, quality=11)
+            path.with_name(path.name + '.br').write_bytes(compressed)
+            totals['brotli'] += len(compressed)
+    
+    print(f"📊 Original:  {totals['original']:>10,} bytes")
+    print(f"📊 Minified:  {totals['minified']:>10,} bytes")
+    print(f"📊 Gzip:      {totals['gzip']:>10,} bytes")
+    if brotli:
+        print(f"📊 Brotli:    {totals['brotli']:>10,} bytes")
+    return totals
+
+def write_service_worker(deployment_dir):
+    """Generate sw.js with a precache list built from the deployment package"""
+    template_path = Path('service-worker.template.js')
+    if not template_path.exists():
+        print("⚠️  service-worker.template.js not found - skipping service worker")
+        return False
+    
+    precache = [path for path in SERVICE_WORKER_PRECACHE if (deployment_dir / path).is_file()]
+    
+    # The cache version changes whenever any precached file (including the
+    # versioned data/catalog.json) changes
+    digest = hashlib.sha256()
+    for relative_path in precache:
+        digest.update(relative_path.encode('utf-8'))
+        digest.update((deployment_dir / relative_path).read_bytes())
+    version = digest.hexdigest()[:12]
+    
+    service_worker = (template_path.read_text(encoding='utf-8')
+                      .replace('__CACHE_VERSION__', version)
+                      .replace('__PRECACHE_URLS__', json.dumps(precache)))
+    (deployment_dir / 'sw.js').write_text(service_worker, encoding='utf-8')
+    print(f"✅ Generated sw.js (cache version {version}, {len(precache)} precached files)")
+    return True
+
+def create_deployment_package(optimize=False):
     """Create a deployment package"""
     print("\n📦 Creating deployment package...")
     
@@ -51,27 +171,38 @@ def create_deployment_package():
         'index.html',
         'script.js',
         'data/products.json',
+        'data/catalog.json',
+        'data/categories/',
+        'data/search-index.json',
         'images/'
     ]
     
+    # Start from an empty folder, so no file of an earlier package (such as
+    # a stale .gz/.br sibling from an --optimize run) is deployed again
     deployment_dir = Path('deployment')
-    deployment_dir.mkdir(exist_ok=True)
+    if deployment_dir.exists():
+        shutil.rmtree(deployment_dir)
+    deployment_dir.mkdir()
     
     for file_path in deployment_files:
         src = Path(file_path)
         dst = deployment_dir / file_path
+        dst.parent.mkdir(parents=True, exist_ok=True)
         
         if src.is_file():
             shutil.copy2(src, dst)
             print(f"✅ Copied {file_path}")
         elif src.is_dir():
-            if dst.exists():
-                shutil.rmtree(dst)
             shutil.copytree(src, dst)
             print(f"✅ Copied {file_path}/")
         else:
             print(f"⚠️  {file_path} not found")
     
+    write_service_worker(deployment_dir)
+    
+    if optimize:
+        optimize_deployment_package(deployment_dir)
+    
     print(f"📁 Deployment package created in {deployment_dir}/")
     return True
 
@@ -97,6 +228,7 @@ def print_deployment_instructions():
    - script.js (website functionality)
    - data/products.json (product data)
    - images/ (product images)
+   - sw.js (service worker for caching, generated)
    
    Popular hosting options:
    - GitHub Pages (free)
@@ -163,6 +295,11 @@ Need help? Check README.md for detailed instructions!
 
 def main():
     """Main deployment function"""
+    parser = argparse.ArgumentParser(description="Om Handicraft deployment helper")
+    parser.add_argument('--optimize', action='store_true',
+                        help="minify text assets and add precompressed .gz/.br files")
+    args = parser.parse_args()
+    
     print("🚀 Om Handicraft - Deployment Helper")
     print("=" * 40)
     
@@ -181,7 +318,7 @@ def main():
         return
     
     # Create deployment package
-    create_deployment_package()
+    create_deployment_package(optimize=args.optimize)
     
     # Print instructions
     print_deployment_instructions()
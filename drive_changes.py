@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Drive Changes Feed for Om Handicraft
+
+Follows the Google Drive changes feed (changes.getStartPageToken and
+changes.list) for `sync_website.py --watch`. A poll costs a single
+changes.list call when nothing happened, and only changes to the product
+sheet or to images in the image folder are passed on; everything else in
+the Drive is ignored.
+"""
+
+import logging
+from typing import Dict, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Changes read per changes.list call (the API maximum)
+CHANGES_PAGE_SIZE = 1000
+
+
+class DriveChanges:
+    """Changes to the sheet and image files collected since the last rebuild"""
+
+    def __init__(self):
+        self.sheet = False
+        # Drive file id -> latest metadata, or None when the file was deleted
+        self.files: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def __bool__(self) -> bool:
+        return self.sheet or bool(self.files)
+
+    def merge(self, other: 'DriveChanges'):
+        """Add changes from a later poll (newer file metadata wins)"""
+        self.sheet = self.sheet or other.sheet
+        self.files.update(other.files)
+
+    def describe(self) -> str:
+        parts = ['the sheet'] if self.sheet else []
+        if self.files:
+            parts.append(f"{len(self.files)} image file(s)")
+        return ' and '.join(parts) or 'nothing'
+
+
+class DriveChangeFeed:
+    """Cursor over the Drive changes feed, filtered to the sheet and image folder"""
+
+    def __init__(self, api, drive_service, sheet_id: str, folder_id: str, file_fields: str):
+        self.api = api
+        self.drive_service = drive_service
+        self.sheet_id = sheet_id
+        self.folder_id = folder_id
+        self.fields = (f"nextPageToken, newStartPageToken, "
+                       f"changes(fileId, removed, file({file_fields}, trashed, parents))")
+        self.page_token = None
+
+    def start(self):
+        """Start following changes made from now on"""
+        response = self.api.execute('drive.changes.getStartPageToken',
+                                    self.drive_service.changes().getStartPageToken())
+        self.page_token = response['startPageToken']
+
+    def poll(self, known_file_ids: Set[str]) -> DriveChanges:
+        """Read the changes made since the last poll.
+
+        known_file_ids are the image files the site already uses; deleted
+        files carry no parents, so they are only reported when known. The
+        cursor only moves once every page was read, so a failed poll is
+        simply repeated next time.
+        """
+        changes = DriveChanges()
+        ignored = 0
+        page_token = self.page_token
+        while True:
+            results = self.api.execute('drive.changes.list', self.drive_service.changes().list(
+                pageToken=page_token,
+                fields=self.fields,
+                pageSize=CHANGES_PAGE_SIZE,
+                includeRemoved=True,
+                spaces='drive'
+            ))
+
+            for change in results.get('changes', []):
+                if not self.add_change(changes, change, known_file_ids):
+                    ignored += 1
+
+            if results.get('newStartPageToken'):
+                self.page_token = results['newStartPageToken']
+                break
+            page_token = results['nextPageToken']
+
+        if ignored:
+            logger.debug(f"Ignored {ignored} changes to unrelated Drive files")
+        return changes
+
+    def add_change(self, changes: DriveChanges, change: Dict[str, Any], known_file_ids: Set[str]) -> bool:
+        """Record a change if it touches the sheet or an image, returning whether it did"""
+        file_id = change.get('fileId')
+        file_info = change.get('file')
+        if not file_id:
+            # Shared drive changes have no file
+            return False
+
+        if file_id == self.sheet_id:
+            changes.sheet = True
+        elif change.get('removed') or not file_info:
+            if file_id not in known_file_ids:
+                return False
+            changes.files[file_id] = None
+        elif self.folder_id in file_info.get('parents', []) or file_id in known_file_ids:
+            # Known files are kept even when moved out of the folder, so their product loses the image
+            changes.files[file_id] = file_info
+        else:
+            return False
+        return True
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Fake Google Sheets/Drive Server for Om Handicraft
+
+An offline stand-in for the parts of the Google APIs that sync_website.py
+uses, so a sync can be run and measured without Google credentials:
+
+    Sheets: spreadsheets.get, spreadsheets.values.get
+    Drive:  files.list, files.get, files.get (alt=media), batch requests,
+            changes.getStartPageToken, changes.list
+
+The catalog is generated from a seed, with one image per product. Edits made
+through FakeCatalog (or every few seconds with --edit-every) show up in the
+Drive changes feed, for trying out `sync_website.py --watch`. Latency and
+an error rate (HTTP 503) can be added to every request, a per-API quota can
+be enforced (HTTP 429 with Retry-After), and the server counts the calls it
+answers.
+
+Usage:
+    python fake_google.py --products 1000 --port 8089
+    python fake_google.py --products 100 --edit-every 20
+    GOOGLE_API_ENDPOINT=http://127.0.0.1:8089 python sync_website.py
+
+config.json must use FAKE_SHEET_ID and FAKE_FOLDER_ID as the sheet and
+image folder ids.
+"""
+
+import argparse
+import email
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+FAKE_SHEET_ID = 'fake-sheet'
+FAKE_FOLDER_ID = 'fake-image-folder'
+FAKE_MODIFIED_TIME = '2024-01-01T00:00:00.000Z'
+SHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+
+HEADER = ['Product ID', 'Name', 'Category', 'Size', 'Price', 'Availability', 'Notes']
+CATEGORIES = ['Pottery', 'Textiles', 'Woodwork', 'Jewelry', 'Metalwork', 'Paintings', 'Home Decor', 'Toys']
+SIZES = ['Small', 'Medium', 'Large']
+AVAILABILITY = ['In Stock', 'In Stock', 'In Stock', 'Limited Stock', 'Out of Stock']
+
+# Drive's HTTP batch endpoint (batchPath in the discovery document)
+BATCH_PATH = 'batch/drive/v3'
+
+SHEET_RANGE = re.compile(r'!?[A-Z]+(\d+):[A-Z]+(\d+)$')
+
+
+def drive_time() -> str:
+    """The current time in Drive's modifiedTime format"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def sample_image() -> bytes:
+    """A small real JPEG when Pillow is installed, so variant building has work to do"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b'\xff\xd8\xff\xe0' + bytes(range(256)) * 4 + b'\xff\xd9'
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 900), (217, 119, 6)).save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+class FakeCatalog:
+    """Generated sheet rows and Drive files for a catalog of a given size"""
+
+    def __init__(self, products: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.rows: List[List[Any]] = [HEADER]
+        for number in range(1, products + 1):
+            category = CATEGORIES[number % len(CATEGORIES)]
+            self.rows.append([
+                f"{category[:3].lower()}-{number:06d}",
+                f"Handmade {category} Item {number}",
+                category,
+                rng.choice(SIZES),
+                rng.randrange(100, 5000, 50),
+                rng.choice(AVAILABILITY),
+                f"Crafted by hand, piece {number}"
+            ])
+
+        # Every image is the same JPEG with the product id appended after
+        # the end-of-image marker, so files differ but still decode
+        self.image_base = sample_image()
+        # Product id -> image bytes after replace_image()
+        self.replaced: Dict[str, bytes] = {}
+        self.files: List[Dict[str, Any]] = []
+        self.files_by_id: Dict[str, Dict[str, Any]] = {}
+        for row in self.rows[1:]:
+            content = self.image_content(row[0])
+            file_info = {
+                'id': f"file-{row[0]}",
+                'name': f"{row[0]}.jpg",
+                'mimeType': 'image/jpeg',
+                'md5Checksum': hashlib.md5(content).hexdigest(),
+                'modifiedTime': FAKE_MODIFIED_TIME,
+                'size': str(len(content))
+            }
+            self.files.append(file_info)
+            self.files_by_id[file_info['id']] = file_info
+
+        # Drive changes feed; change N (from 1) is read with page token str(N)
+        self.changes: List[Dict[str, Any]] = []
+        self.sources = {file_id: {'modifiedTime': FAKE_MODIFIED_TIME, 'version': '1'}
+                        for file_id in (FAKE_SHEET_ID, FAKE_FOLDER_ID)}
+        self.lock = threading.Lock()
+
+    def image_content(self, product_id: str) -> bytes:
+        return self.replaced.get(product_id) or self.image_base + product_id.encode('utf-8')
+
+    # Edits (lists are replaced rather than changed in place, so requests
+    # being answered at the same time see either the old or the new catalog)
+
+    def edit_row(self, product_id: str, column: str, value: Any):
+        """Change one cell of a product's row"""
+        with self.lock:
+            index = HEADER.index(column)
+            self.rows = [row[:index] + [value] + row[index + 1:] if row[0] == product_id else row
+                         for row in self.rows]
+            self.touch_source(FAKE_SHEET_ID)
+
+    def add_product(self, product_id: str, category: str = CATEGORIES[0]):
+        """Append a row and upload its image"""
+        with self.lock:
+            self.rows = self.rows + [[product_id, f"Handmade {category} Item", category, SIZES[0], 500,
+                                      AVAILABILITY[0], "Added while watching"]]
+            self.touch_source(FAKE_SHEET_ID)
+            self.upload_image(product_id, self.image_base + product_id.encode('utf-8'))
+
+    def delete_product(self, product_id: str):
+        """Remove a product's row and permanently delete its image"""
+        with self.lock:
+            self.rows = [row for row in self.rows if row[0] != product_id]
+            self.touch_source(FAKE_SHEET_ID)
+            file_id = f"file-{product_id}"
+            if self.files_by_id.pop(file_id, None):
+                self.files = [f for f in self.files if f['id'] != file_id]
+                self.touch_source(FAKE_FOLDER_ID, record=False)
+                self.record_change(file_id, None)
+
+    def replace_image(self, product_id: str):
+        """Upload new content for a product's image"""
+        with self.lock:
+            self.upload_image(product_id, self.image_base + f"{product_id}-{drive_time()}".encode('utf-8'))
+
+    def touch_unrelated(self, name: str = 'notes.txt'):
+        """Change a file outside the sheet and image folder"""
+        with self.lock:
+            self.record_change(f"unrelated-{name}", {
+                'id': f"unrelated-{name}", 'name': name, 'mimeType': 'text/plain',
+                'modifiedTime': drive_time(), 'parents': ['root'], 'trashed': False
+            })
+
+    def random_edit(self, rng: random.Random) -> str:
+        """Make one random edit, returning a description of it"""
+        product_id = rng.choice(self.rows[1:])[0]
+        if rng.random() < 0.5:
+            price = rng.randrange(100, 5000, 50)
+            self.edit_row(product_id, 'Price', price)
+            return f"price of {product_id} set to {price}"
+        self.replace_image(product_id)
+        return f"new image for {product_id}"
+
+    def upload_image(self, product_id: str, content: bytes):
+        file_id = f"file-{product_id}"
+        file_info = {
+            'id': file_id,
+            'name': f"{product_id}.jpg",
+            'mimeType': 'image/jpeg',
+            'md5Checksum': hashlib.md5(content).hexdigest(),
+            'modifiedTime': drive_time(),
+            'size': str(len(content))
+        }
+        self.replaced[product_id] = content
+        if file_id not in self.files_by_id:
+            self.touch_source(FAKE_FOLDER_ID, record=False)
+        self.files = [f for f in self.files if f['id'] != file_id] + [file_info]
+        self.files_by_id[file_id] = file_info
+        self.record_change(file_id, dict(file_info, parents=[FAKE_FOLDER_ID], trashed=False))
+
+    def touch_source(self, file_id: str, record: bool = True):
+        """Bump the version of the sheet or image folder"""
+        source = self.sources[file_id]
+        source.update(modifiedTime=drive_time(), version=str(int(source['version']) + 1))
+        if record and file_id == FAKE_SHEET_ID:
+            self.record_change(file_id, {'id': file_id, 'name': 'Products', 'mimeType': SHEET_MIME_TYPE,
+                                         'parents': ['root'], 'trashed': False, **source})
+
+    def record_change(self, file_id: str, file_info: Optional[Dict[str, Any]]):
+        change = {'kind': 'drive#change', 'changeType': 'file', 'time': drive_time(),
+                  'fileId': file_id, 'removed': file_info is None}
+        if file_info is not None:
+            change['file'] = file_info
+        self.changes = self.changes + [change]
+
+
+class FakeGoogleServer(ThreadingHTTPServer):
+    """HTTP server answering Sheets and Drive requests from a FakeCatalog"""
+
+    daemon_threads = True
+
+    def __init__(self, catalog: FakeCatalog, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, error_rate: float = 0.0, seed: int = 0,
+                 quota_per_second: float = 0.0):
+        super().__init__((host, port), FakeGoogleHandler)
+        self.catalog = catalog
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.quota_per_second = quota_per_second
+        # API ('sheets' or 'drive') -> start of the current one-second window and requests in it
+        self.quota_windows: Dict[str, List[float]] = {}
+        self.calls = Counter()
+        self.bytes_sent = 0
+        self.stats_lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, call: str, size: int = 0):
+        with self.stats_lock:
+            self.calls[call] += 1
+            self.bytes_sent += size
+
+    def should_fail(self) -> bool:
+        with self.stats_lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def over_quota(self, api: str) -> bool:
+        """Count a request against the API's quota for the current second"""
+        if not self.quota_per_second:
+            return False
+        with self.stats_lock:
+            now = time.monotonic()
+            window = self.quota_windows.setdefault(api, [now, 0])
+            if now - window[0] >= 1.0:
+                window[:] = [now, 0]
+            window[1] += 1
+            return window[1] > self.quota_per_second
+
+    def stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            return {'calls': dict(self.calls), 'total_calls': sum(self.calls.values()),
+                    'bytes_sent': self.bytes_sent}
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        status, body, headers = self.answer(self.path)
+        if isinstance(body, bytes):
+            self.send_bytes(status, body, 'image/jpeg', headers)
+        else:
+            self.send_json(status, body, headers)
+
+    def do_POST(self):
+        """Drive batch endpoint: one multipart/mixed request holding many GETs"""
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if urlsplit(self.path).path.strip('/') != BATCH_PATH:
+            return self.send_json(404, {'error': {'code': 404, 'message': f"Not found: {self.path}"}})
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.record('drive.batch')
+
+        message = email.message_from_bytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('utf-8') + body)
+        boundary = f"batch_{self.server.random.getrandbits(64):016x}"
+        parts = []
+        for part in message.get_payload():
+            method, target = part.get_payload().split('\r\n', 1)[0].split(' ')[:2]
+            if method != 'GET':
+                status, content, headers = 405, {'error': {'code': 405, 'message': 'Only GET is batched'}}, {}
+            else:
+                status, content, headers = self.answer(target)
+            if isinstance(content, bytes):
+                status, content = 400, {'error': {'code': 400, 'message': 'Media downloads cannot be batched'}}
+
+            payload = json.dumps(content)
+            extra = ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n{extra}"
+                f"Content-Length: {len(payload)}\r\n\r\n{payload}\r\n"
+            )
+        response = ''.join(parts) + f"--{boundary}--\r\n"
+        self.send_bytes(200, response.encode('utf-8'), f"multipart/mixed; boundary={boundary}")
+
+    def answer(self, target: str) -> Tuple[int, Any, Dict[str, str]]:
+        """Answer one API request: (status, JSON body or media bytes, extra headers)"""
+        url = urlsplit(target)
+        path = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        call = self.route_name(path, query)
+        if call is None:
+            return 404, {'error': {'code': 404, 'message': f"Not found: {url.path}"}}, {}
+
+        if self.server.over_quota(call.split('.', 1)[0]):
+            self.server.record('throttled')
+            return 429, {'error': {'code': 429, 'message': 'Quota exceeded'}}, {'Retry-After': '1'}
+
+        if self.server.should_fail():
+            self.server.record('errors')
+            return 503, {'error': {'code': 503, 'message': 'Backend Error'}}, {}
+
+        status, body = getattr(self, call.replace('.', '_'))(path, query)
+        self.server.record(call, len(body) if isinstance(body, bytes) else 0)
+        return status, body, {}
+
+    def route_name(self, path: List[str], query: Dict[str, str]) -> Optional[str]:
+        if path[:2] == ['v4', 'spreadsheets'] and len(path) == 3:
+            return 'sheets.get'
+        if path[:2] == ['v4', 'spreadsheets'] and len(path) == 5 and path[3] == 'values':
+            return 'sheets.values.get'
+        if path[:3] == ['drive', 'v3', 'files'] and len(path) == 3:
+            return 'drive.files.list'
+        if path[:3] == ['drive', 'v3', 'files'] and len(path) == 4:
+            return 'drive.files.get_media' if query.get('alt') == 'media' else 'drive.files.get'
+        if path[:3] == ['drive', 'v3', 'changes'] and len(path) == 3:
+            return 'drive.changes.list'
+        if path == ['drive', 'v3', 'changes', 'startPageToken']:
+            return 'drive.changes.get_start_page_token'
+        return None
+
+    # Sheets
+
+    def sheets_get(self, path, query):
+        if path[2] != FAKE_SHEET_ID:
+            return 404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+        return 200, {'sheets': [{'properties': {
+            'title': 'Sheet1',
+            'gridProperties': {'rowCount': len(self.server.catalog.rows), 'columnCount': len(HEADER)}
+        }}]}
+
+    def sheets_values_get(self, path, query):
+        match = SHEET_RANGE.search(path[4])
+        if path[2] != FAKE_SHEET_ID or not match:
+            return 400, {'error': {'code': 400, 'message': f"Unable to parse range: {path[4]}"}}
+        first, last = int(match.group(1)), int(match.group(2))
+        rows = self.server.catalog.rows[first - 1:last]
+        if query.get('valueRenderOption') != 'UNFORMATTED_VALUE':
+            rows = [[str(cell) for cell in row] for row in rows]
+        return 200, {'range': path[4], 'majorDimension': 'ROWS', 'values': rows}
+
+    # Drive
+
+    def drive_files_list(self, path, query):
+        q = query.get('q', '')
+        files = self.server.catalog.files if f"'{FAKE_FOLDER_ID}' in parents" in q else []
+        changed_since = re.search(r"modifiedTime > '([^']+)'", q)
+        if changed_since:
+            files = [f for f in files if f['modifiedTime'] > changed_since.group(1)]
+        if query.get('orderBy') == 'modifiedTime desc':
+            files = sorted(files, key=lambda f: f['modifiedTime'], reverse=True)
+
+        start = int(query.get('pageToken') or 0)
+        page_size = min(int(query.get('pageSize') or 100), 1000)
+        result = {'files': files[start:start + page_size]}
+        if start + page_size < len(files):
+            result['nextPageToken'] = str(start + page_size)
+        return 200, result
+
+    def drive_files_get(self, path, query):
+        if path[3] in (FAKE_SHEET_ID, FAKE_FOLDER_ID):
+            return 200, dict(self.server.catalog.sources[path[3]])
+        file_info = self.server.catalog.files_by_id.get(path[3])
+        if not file_info:
+            return 404, {'error': {'code': 404, 'message': f"File not found: {path[3]}."}}
+        return 200, dict(file_info, parents=[FAKE_FOLDER_ID], trashed=False)
+
+    def drive_files_get_media(self, path, query):
+        file_info = self.server.catalog.files_by_id.get(path[3])
+        if not file_info:
+            return 404, {'error': {'code': 404, 'message': f"File not found: {path[3]}."}}
+        return 200, self.server.catalog.image_content(file_info['name'][:-len('.jpg')])
+
+    def drive_changes_get_start_page_token(self, path, query):
+        return 200, {'kind': 'drive#startPageToken', 'startPageToken': str(len(self.server.catalog.changes) + 1)}
+
+    def drive_changes_list(self, path, query):
+        changes = self.server.catalog.changes
+        token = query.get('pageToken', '')
+        if not token.isdigit() or not 1 <= int(token) <= len(changes) + 1:
+            return 400, {'error': {'code': 400, 'message': f"Invalid Value: pageToken {token!r}"}}
+
+        start = int(token) - 1
+        page_size = min(int(query.get('pageSize') or 100), 1000)
+        result = {'kind': 'drive#changeList', 'changes': changes[start:start + page_size]}
+        if start + page_size < len(changes):
+            result['nextPageToken'] = str(start + page_size + 1)
+        else:
+            result['newStartPageToken'] = str(len(changes) + 1)
+        return 200, result
+
+    # Responses
+
+    def send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        self.send_bytes(status, json.dumps(body).encode('utf-8'), 'application/json; charset=UTF-8', headers)
+
+    def send_bytes(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Google Sheets/Drive catalog for offline syncs")
+    parser.add_argument('--products', type=int, default=1000, help="number of products in the sheet")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--quota', type=float, default=0.0,
+                        help="requests per second per API before answering 429 (0 = unlimited)")
+    parser.add_argument('--edit-every', type=float, default=0.0,
+                        help="make a random sheet or image edit every this many seconds (0 = never)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeGoogleServer(FakeCatalog(args.products, args.seed), args.host, args.port,
+                              args.latency, args.error_rate, args.seed, args.quota)
+    print(f"🧪 Serving {args.products} fake products at {server.endpoint}")
+    print(f"💡 Use sheet id '{FAKE_SHEET_ID}' and folder id '{FAKE_FOLDER_ID}' in config.json")
+
+    if args.edit_every:
+        def edit_forever():
+            rng = random.Random(args.seed)
+            while True:
+                time.sleep(args.edit_every)
+                print(f"✏️  {server.catalog.random_edit(rng)}")
+
+        threading.Thread(target=edit_forever, daemon=True).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
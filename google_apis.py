@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Google API Clients for Om Handicraft
+
+Builds the Sheets and Drive services used by sync_website.py. The Google
+client libraries are only imported when a service or credential is first
+needed, so code paths that never talk to Google (sample products,
+prerendering, deploy checks) start without paying for them. Discovery
+documents are read from a local cache instead of being fetched and parsed
+per service, and one credentials object is shared by every service built
+in the process.
+"""
+
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    'https://www.googleapis.com/auth/drive.readonly'
+]
+
+# Discovery documents fetched from the network are kept here between runs
+DISCOVERY_CACHE_DIR = Path(__file__).parent / '.cache' / 'discovery'
+
+# Set to the base URL of a stand-in server (see fake_google.py) to send every
+# Sheets and Drive request there with anonymous credentials
+API_ENDPOINT_ENV = 'GOOGLE_API_ENDPOINT'
+
+# Path of each API below the endpoint, as in the real root URLs
+SERVICE_PATHS = {
+    'sheets': '',
+    'drive': 'drive/v3/',
+}
+
+# Requests per minute allowed per API, matching the default per-user quotas
+# of the Google Cloud project (override with sync.api_rate_limits)
+DEFAULT_RATE_LIMITS = {
+    'sheets': 60,
+    'drive': 12000,
+}
+
+# A bucket holds this many seconds' worth of requests, so short bursts (such
+# as the first sheet reads) are not paced. The burst comes out of the quota:
+# the bucket refills at the rest of it, so no minute exceeds the limit.
+BURST_SECONDS = 10
+
+# Retries stop once this much time has been spent waiting on one call
+DEFAULT_MAX_RETRY_SECONDS = 120
+
+# Exponential backoff: base * 2**attempt seconds, capped, with full jitter
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+
+# Most requests the Google batch endpoints accept in one round trip
+BATCH_LIMIT = 100
+
+# Responses worth retrying (403 only when Google reports a rate limit)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = (b'ratelimitexceeded', b'userratelimitexceeded')
+
+# Errors raised before any response arrived
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, socket.timeout)
+
+# Socket timeout of every pooled HTTP transport
+HTTP_TIMEOUT_SECONDS = 60
+
+# Local OAuth files used outside GitHub Actions
+TOKEN_FILE = 'token.json'
+CLIENT_SECRETS_FILE = 'credentials.json'
+
+# Seconds spent per cold start step: 'imports', 'credentials', 'discovery'
+startup_timings: Dict[str, float] = {}
+
+_lock = threading.Lock()
+_credentials = None
+_discovery_documents: Dict[str, str] = {}
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve HttpError on first use, so 'except google_apis.HttpError' works without an eager import"""
+    if name == 'HttpError':
+        from googleapiclient.errors import HttpError
+        return HttpError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def record_timing(step: str, started: float):
+    """Add the time since started to a cold start step"""
+    startup_timings[step] = startup_timings.get(step, 0.0) + time.perf_counter() - started
+
+
+def load_credentials():
+    """Return the process-wide Google credentials, loading them on first use.
+
+    In GitHub Actions the service account JSON comes from the
+    GOOGLE_CREDENTIALS secret; locally the OAuth token in token.json is used
+    (and refreshed or created through the browser flow when needed).
+    """
+    global _credentials
+    with _lock:
+        if _credentials is not None and _credentials.valid:
+            return _credentials
+
+        if _credentials is not None and _credentials.expired and getattr(_credentials, 'refresh_token', None):
+            from google.auth.transport.requests import Request
+            _credentials.refresh(Request())
+            return _credentials
+
+        started = time.perf_counter()
+        if os.getenv(API_ENDPOINT_ENV):
+            # Stand-in server - no Google account involved
+            from google.auth.credentials import AnonymousCredentials
+            record_timing('imports', started)
+            started = time.perf_counter()
+            creds = AnonymousCredentials()
+
+        elif os.getenv('GITHUB_ACTIONS'):
+            # GitHub Actions - use Service Account credentials from secrets
+            logger.info("Running in GitHub Actions - using service account credentials")
+
+            credentials_json = os.getenv('GOOGLE_CREDENTIALS')
+            if not credentials_json:
+                raise ValueError("GOOGLE_CREDENTIALS environment variable not set")
+
+            from google.oauth2 import service_account
+            record_timing('imports', started)
+            started = time.perf_counter()
+            creds = service_account.Credentials.from_service_account_info(
+                json.loads(credentials_json), scopes=SCOPES)
+
+        else:
+            # Local development - use OAuth flow
+            from google.oauth2.credentials import Credentials
+            from google.auth.transport.requests import Request
+            record_timing('imports', started)
+            started = time.perf_counter()
+
+            creds = None
+            if os.path.exists(TOKEN_FILE):
+                creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                else:
+                    from google_auth_oauthlib.flow import InstalledAppFlow
+                    flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, SCOPES)
+                    creds = flow.run_local_server(port=0)
+
+                with open(TOKEN_FILE, 'w') as token:
+                    token.write(creds.to_json())
+
+        record_timing('credentials', started)
+        _credentials = creds
+        return creds
+
+
+class DiscoveryCache:
+    """File cache for discovery documents, in the interface googleapiclient expects"""
+
+    def __init__(self, cache_dir: Path = DISCOVERY_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def path(self, url: str) -> Path:
+        return self.cache_dir / (hashlib.sha256(url.encode('utf-8')).hexdigest()[:16] + '.json')
+
+    def get(self, url: str) -> Optional[str]:
+        try:
+            return self.path(url).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def set(self, url: str, content: str):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.path(url).write_text(content, encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Could not cache discovery document: {e}")
+
+
+def discovery_document(api: str, version: str) -> Optional[str]:
+    """Return the discovery document for api/version, or None if it has to be fetched.
+
+    Uses the documents that ship with the installed google-api-python-client,
+    so they always match the library version. Found documents are kept in
+    memory, so per-thread services do not read them again. Documents that
+    have to be fetched are cached by DiscoveryCache instead.
+    """
+    key = f"{api}.{version}"
+    with _lock:
+        if key in _discovery_documents:
+            return _discovery_documents[key]
+
+    from googleapiclient.discovery_cache import get_static_doc
+    document = get_static_doc(api, version)
+    if document is not None:
+        with _lock:
+            _discovery_documents[key] = document
+    return document
+
+
+def build_service(api: str, version: str, credentials=None, http=None):
+    """Build a Sheets or Drive service from the cached discovery document.
+
+    Without http, each call returns a service with its own new HTTP transport
+    (httplib2 is not thread-safe), but they all share the same credentials.
+    Pass an authorized http (see ServicePool) to build on an existing one.
+    """
+    started = time.perf_counter()
+    from googleapiclient.discovery import build, build_from_document
+    record_timing('imports', started)
+
+    auth = {'http': http} if http is not None else {'credentials': credentials or load_credentials()}
+    started = time.perf_counter()
+    endpoint = os.getenv(API_ENDPOINT_ENV)
+    client_options = {'api_endpoint': endpoint.rstrip('/') + '/' + SERVICE_PATHS.get(api, '')} if endpoint else None
+    document = discovery_document(api, version)
+    if document is not None and endpoint:
+        # Batch requests are sent to rootUrl, which api_endpoint does not change
+        document = dict(json.loads(document), rootUrl=endpoint.rstrip('/') + '/')
+    if document is not None:
+        service = build_from_document(document, client_options=client_options, **auth)
+    else:
+        service = build(api, version, client_options=client_options,
+                        cache=DiscoveryCache(), static_discovery=False, **auth)
+    record_timing('discovery', started)
+    return service
+
+
+class PooledTransport:
+    """One authorized keep-alive HTTP transport and the services built on it.
+
+    Only one thread uses a transport at a time (see ServicePool), so its
+    counters need no lock. A request counts as reusing a connection when the
+    socket to its host was already open before and is still the same after.
+    """
+
+    def __init__(self, credentials):
+        import httplib2
+        import google_auth_httplib2
+
+        self.http = httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)
+        self.authorized_http = google_auth_httplib2.AuthorizedHttp(credentials, http=self.http)
+        self.services: Dict[str, Any] = {}
+        self.requests = 0
+        self.connections_opened = 0
+
+        # AuthorizedHttp calls http.request, so the instance attribute wraps every request
+        send = self.http.request
+
+        def request(uri, *args, **kwargs):
+            before = self.socket_for(uri)
+            try:
+                return send(uri, *args, **kwargs)
+            finally:
+                after = self.socket_for(uri)
+                self.requests += 1
+                if before is None or after is not before:
+                    self.connections_opened += 1
+
+        self.http.request = request
+
+    def socket_for(self, uri: str):
+        """The open socket httplib2 holds for uri's host, if any"""
+        parts = urlsplit(uri)
+        conn = self.http.connections.get(f"{parts.scheme.lower()}:{parts.netloc.lower()}")
+        return getattr(conn, 'sock', None)
+
+    def service(self, api: str, version: str):
+        """The api/version service on this transport, built on first use"""
+        key = f"{api}.{version}"
+        if key not in self.services:
+            self.services[key] = build_service(api, version, http=self.authorized_http)
+        return self.services[key]
+
+    def close(self):
+        for conn in self.http.connections.values():
+            conn.close()
+
+
+class ServicePool:
+    """Bounded pool of keep-alive transports for Sheets and Drive services.
+
+    A worker checks out a transport for the duration of a call (or a whole
+    download) and returns it afterwards, so a transport is never used by two
+    threads at once while its open connections carry over to the next
+    request. Every transport authorizes with the same shared credentials.
+    """
+
+    def __init__(self, credentials, size: int):
+        self.credentials = credentials
+        self.size = max(1, size)
+        self.idle = queue.LifoQueue()
+        self.pooled = 0
+        # Pooled and dedicated transports, for stats()
+        self.transports = []
+        self.lock = threading.Lock()
+
+    def checkout(self) -> PooledTransport:
+        """Take an idle transport, create one while under size, or wait for one"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            create = self.pooled < self.size
+            if create:
+                self.pooled += 1
+        if not create:
+            return self.idle.get()
+
+        transport = PooledTransport(self.credentials)
+        with self.lock:
+            self.transports.append(transport)
+        return transport
+
+    @contextmanager
+    def service(self, api: str, version: str) -> Iterator[Any]:
+        """Check out a transport and yield its api/version service"""
+        transport = self.checkout()
+        try:
+            yield transport.service(api, version)
+        finally:
+            self.idle.put(transport)
+
+    def dedicated(self, api: str, version: str):
+        """A service on its own counted transport, kept outside the pool (for the main thread)"""
+        transport = PooledTransport(self.credentials)
+        with self.lock:
+            self.transports.append(transport)
+        return transport.service(api, version)
+
+    def stats(self) -> Dict[str, int]:
+        """Connection reuse across all transports"""
+        with self.lock:
+            transports = list(self.transports)
+        requests = sum(transport.requests for transport in transports)
+        opened = sum(transport.connections_opened for transport in transports)
+        return {
+            'transports': len(transports),
+            'requests': requests,
+            'opened': opened,
+            'reused': requests - opened
+        }
+
+    def close(self):
+        with self.lock:
+            for transport in self.transports:
+                transport.close()
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing rate requests per second, in bursts of up to capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        """Add the tokens earned since the last update (call with the lock held)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, count: int = 1) -> float:
+        """Take count tokens, sleeping until they are available. Returns the seconds waited."""
+        with self.lock:
+            self.refill()
+            # Tokens may go negative: each caller reserves its own slot in the queue
+            self.tokens -= count
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, seconds: float):
+        """Hold back every caller for at least seconds (after a 429 with Retry-After)"""
+        with self.lock:
+            self.refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def retry_after_seconds(error) -> Optional[float]:
+    """Read the Retry-After header of an HttpError, as seconds or an HTTP date"""
+    value = getattr(error, 'resp', None) and error.resp.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ApiGateway:
+    """Single entry point for Sheets and Drive calls.
+
+    Every call first takes a token from its API's bucket, so concurrent
+    workers together stay under the quota instead of tripping it. Rate limit
+    (429, 403 rateLimitExceeded), server errors and connection errors are
+    retried with jittered exponential backoff, waiting at least as long as
+    Retry-After asks, until max_retry_seconds of waiting has been used up.
+    Call names look like 'drive.files.list'; the part before the first dot
+    selects the bucket.
+    """
+
+    def __init__(self, rate_limits: Dict[str, float] = None,
+                 max_retry_seconds: float = DEFAULT_MAX_RETRY_SECONDS, metrics=None):
+        limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self.buckets = {}
+        for api, per_minute in limits.items():
+            burst = per_minute * BURST_SECONDS / 60.0
+            self.buckets[api] = TokenBucket((per_minute - burst) / 60.0, burst)
+        self.max_retry_seconds = max_retry_seconds
+        self.metrics = metrics
+
+    def count(self, name: str, amount: int = 1):
+        if self.metrics is not None and amount:
+            self.metrics.count(name, amount)
+
+    def execute(self, name: str, request) -> Any:
+        """Execute a googleapiclient request through the gateway"""
+        return self.call(name, request.execute)
+
+    def call(self, name: str, func: Callable[[], Any], tokens: int = 1) -> Any:
+        """Run func (one HTTP request) under the rate limit, retrying transient failures.
+
+        tokens is the number of quota units the request uses (one per request
+        inside a batch).
+        """
+        bucket = self.buckets.get(name.split('.', 1)[0])
+        waited = 0.0
+        attempt = 0
+        while True:
+            if bucket:
+                self.count('rate_limit_wait_ms', int(bucket.acquire(tokens) * 1000))
+            self.count(f"api.{name}")
+            try:
+                return func()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None or waited + delay > self.max_retry_seconds:
+                    raise
+                # A Retry-After applies to everyone sharing the quota, so it
+                # holds back the whole bucket and the retry waits in acquire()
+                deferred = bucket is not None and retry_after_seconds(e) is not None
+                if deferred:
+                    bucket.defer(delay)
+                logger.warning(f"{name} failed ({describe_error(e)}), retry {attempt + 1} in {delay:.1f}s")
+
+            attempt += 1
+            waited += delay
+            self.count(f"retries.{name}")
+            if not deferred:
+                time.sleep(delay)
+
+    def execute_batch(self, name: str, service, requests: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """Execute many requests of one kind through the API's HTTP batch endpoint.
+
+        requests maps caller keys (such as product ids) to googleapiclient
+        requests. They are sent BATCH_LIMIT at a time, one round trip per
+        batch. Parts that fail with a retryable error are retried one by one
+        through execute(); the rest are returned as errors. Returns
+        (results, errors), both keyed like requests.
+        """
+        api = name.split('.', 1)[0]
+        results = {}
+        errors = {}
+        keys = list(requests)
+        for start in range(0, len(keys), BATCH_LIMIT):
+            chunk = keys[start:start + BATCH_LIMIT]
+            responses = {}
+
+            def send():
+                # A fresh batch per attempt, so a retried round trip resends every part
+                responses.clear()
+                batch = service.new_batch_http_request()
+                for key in chunk:
+                    batch.add(requests[key], callback=lambda request_id, response, exception, key=key:
+                              responses.__setitem__(key, (response, exception)))
+                batch.execute()
+
+            self.call(f"{api}.batch", send, tokens=len(chunk))
+            self.count(f"batched.{name}", len(chunk))
+
+            for key in chunk:
+                # Parts missing from the batch response are retried like failed ones
+                response, exception = responses.get(key, (None, ConnectionError()))
+                if exception is None:
+                    results[key] = response
+                elif self.retry_delay(exception, 0) is None:
+                    errors[key] = exception
+                else:
+                    self.count(f"batch_retries.{name}")
+                    try:
+                        results[key] = self.execute(name, requests[key])
+                    except Exception as e:
+                        errors[key] = e
+        return results, errors
+
+    def retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after error, or None if it should not be retried"""
+        status = getattr(getattr(error, 'resp', None), 'status', None)
+        if status is not None:
+            content = (getattr(error, 'content', b'') or b'').lower()
+            if status not in RETRYABLE_STATUS and not (
+                    status == 403 and any(reason in content for reason in RATE_LIMIT_REASONS)):
+                return None
+        elif not isinstance(error, TRANSIENT_ERRORS):
+            return None
+
+        backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        return max(backoff, retry_after) if retry_after is not None else backoff
+
+
+def describe_error(error: Exception) -> str:
+    """Short description of an API error for log lines"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return f"HTTP {status}" if status is not None else type(error).__name__
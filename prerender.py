@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Product Grid Prerenderer for Om Handicraft
+
+Writes the category buttons and the initial "All Items" product grid straight
+into index.html so products are visible on first paint. Cards are filled in
+from the same <template> that OmHandicraft.createProductCard() in script.js
+uses, and script.js takes over the prerendered nodes once it has loaded.
+"""
+
+import html
+import re
+from typing import List, Dict, Any
+
+# Rendered width of a product image at each breakpoint of the products grid
+# (keep in sync with PRODUCT_IMAGE_SIZES in script.js)
+PRODUCT_IMAGE_SIZES = '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw'
+
+# Only the first cards are prerendered so index.html stays small for big
+# catalogs; script.js renders the rest
+PRERENDER_LIMIT = 48
+
+# Marker comments in index.html that delimit each prerendered region
+CATEGORIES_REGION = 'categories'
+PRODUCTS_REGION = 'products'
+
+# Card markup shared with script.js, and the empty text elements inside it
+CARD_TEMPLATE = re.compile(r'<template id="product-card-template">(.*?)</template>', re.DOTALL)
+CARD_TEXT_FIELD = re.compile(r'(<(\w+) data-field="(\w+)"[^>]*>)(</\2>)')
+
+
+def escape(value: Any) -> str:
+    """Escape a value for use in HTML text or a double-quoted attribute"""
+    return html.escape(str(value), quote=True)
+
+
+def render_image_sources(product: Dict[str, Any]) -> str:
+    """Render one <source> per variant type, like createImageSources()"""
+    variants = product.get('variants') or []
+    types = list(dict.fromkeys(variant['type'] for variant in variants))
+
+    sources = []
+    for mime_type in types:
+        srcset = ', '.join(
+            f"images/{variant['src']} {variant['width']}w"
+            for variant in variants if variant['type'] == mime_type
+        )
+        sources.append(f'<source type="{escape(mime_type)}" srcset="{escape(srcset)}" sizes="{PRODUCT_IMAGE_SIZES}">')
+    return ''.join(sources)
+
+
+def availability_color(availability: str) -> str:
+    """Text color class for an availability label, like createProductCard()"""
+    if availability == 'In Stock':
+        return 'text-green-600'
+    if availability == 'Limited Stock':
+        return 'text-yellow-600'
+    return 'text-red-600'
+
+
+def get_card_template(page: str) -> str:
+    """Extract the product card markup from the <template> in index.html"""
+    match = CARD_TEMPLATE.search(page)
+    if not match:
+        raise ValueError("index.html has no product-card-template")
+    return match.group(1).strip()
+
+
+def render_product_card(template: str, product: Dict[str, Any]) -> str:
+    """Fill the shared card template for one product, like createProductCard()"""
+    card = template.replace('data-product-id=""', f'data-product-id="{escape(product.get("id", ""))}"', 1)
+    card = card.replace(
+        '<img data-field="image" src="" alt=""',
+        f'{render_image_sources(product)}<img data-field="image" '
+        f'src="images/{escape(product.get("image", ""))}" alt="{escape(product.get("name", ""))}"',
+        1
+    )
+    card = card.replace(
+        'data-field="availability" class="',
+        f'data-field="availability" class="{availability_color(product.get("availability", ""))} ',
+        1
+    )
+    return CARD_TEXT_FIELD.sub(
+        lambda match: match.group(1) + escape(product.get(match.group(3), '')) + match.group(4),
+        card
+    )
+
+
+def render_category_button(category: str) -> str:
+    """Render a category filter button, like renderCategories()"""
+    return (
+        f'\n                <button class="category-filter px-6 py-3 rounded-full bg-white shadow-md hover:shadow-lg '
+        f'transition-all duration-300 hover-lift" data-category="{escape(category)}">{escape(category)}</button>'
+    )
+
+
+def replace_region(page: str, region: str, content: str) -> str:
+    """Replace the content between the start/end markers of a region"""
+    pattern = re.compile(
+        r'(<!-- prerender:%s:start -->).*?(\n[ \t]*<!-- prerender:%s:end -->)' % (region, region),
+        re.DOTALL
+    )
+    if not pattern.search(page):
+        raise ValueError(f"index.html has no prerender markers for '{region}'")
+    return pattern.sub(lambda match: match.group(1) + content.rstrip() + match.group(2), page, count=1)
+
+
+def prerender_index(page: str, products: List[Dict[str, Any]], categories: List[str]) -> str:
+    """Return index.html with the category buttons and product grid filled in"""
+    template = get_card_template(page)
+
+    # Same order as the website's "All Items" view: grouped by category
+    category_order = {category: index for index, category in enumerate(categories)}
+    ordered = sorted(products, key=lambda product: category_order.get(product.get('category'), len(categories)))
+    cards = ''.join(f"\n            {render_product_card(template, product)}" for product in ordered[:PRERENDER_LIMIT])
+
+    page = replace_region(page, CATEGORIES_REGION, ''.join(render_category_button(c) for c in categories))
+    page = replace_region(page, PRODUCTS_REGION, cards)
+    return page
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Product Model for Om Handicraft
+
+A compact, typed record for one catalog row, built from the typed cell values
+that the Sheets API returns with valueRenderOption=UNFORMATTED_VALUE. Columns
+are located by their header text, so the sheet's column order can change.
+"""
+
+import hashlib
+import json
+import re
+from typing import List, Dict, Any, Optional, Union
+
+# Header text (lowercased, spaces collapsed) -> Product field
+HEADER_ALIASES = {
+    'id': 'id',
+    'product id': 'id',
+    'product_id': 'id',
+    'sku': 'id',
+    'name': 'name',
+    'product name': 'name',
+    'category': 'category',
+    'size': 'size',
+    'price': 'price',
+    'availability': 'availability',
+    'stock': 'availability',
+    'note': 'note',
+    'notes': 'note',
+    'description': 'note',
+}
+
+# Column order of the original Sheet1!A:G layout, used for every field the
+# header row does not name
+DEFAULT_COLUMNS = {
+    'id': 0,
+    'name': 1,
+    'category': 2,
+    'size': 3,
+    'price': 4,
+    'availability': 5,
+    'note': 6,
+}
+
+
+# Price/number in a cell: digits with optional thousands commas and decimals
+PRICE_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+
+def column_map(header: List[Any]) -> Dict[str, int]:
+    """Map Product fields to column indexes using the sheet's header row.
+
+    Headers are matched after lowercasing and dropping a parenthesized
+    suffix ("Price (INR)"). Fields without a recognised header keep their
+    column from DEFAULT_COLUMNS, unless another field already claimed it.
+    """
+    columns = {}
+    for index, title in enumerate(header):
+        text = re.sub(r'\(.*?\)', ' ', str(title).lower())
+        field = HEADER_ALIASES.get(' '.join(text.split()))
+        if field and field not in columns:
+            columns[field] = index
+
+    claimed = set(columns.values())
+    for field, index in DEFAULT_COLUMNS.items():
+        if field not in columns and index not in claimed:
+            columns[field] = index
+            claimed.add(index)
+    return columns
+
+
+def cell_text(value: Any) -> str:
+    """Render a typed cell value as text (whole numbers without a trailing .0)"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_price(value: Any) -> Union[int, float]:
+    """Parse a price cell such as 450, 450.0, '1,200', '₹450.00' or 'Rs. 450'.
+
+    Text cells use their first number, so a range like '1200-1500' gives
+    its lower bound.
+    """
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        match = PRICE_PATTERN.search(str(value))
+        if not match:
+            return 0
+        number = float(match.group().replace(',', ''))
+    return int(number) if number.is_integer() else round(number, 2)
+
+
+# Fields read from the sheet row (everything except the derived image data)
+ROW_FIELDS = ('id', 'name', 'category', 'size', 'price', 'availability', 'note')
+
+
+class Product:
+    """One product in the catalog"""
+
+    __slots__ = ('id', 'name', 'category', 'size', 'price', 'availability', 'image', 'note', 'variants')
+
+    def __init__(self, id: str, name: str = '', category: str = '', size: str = '',
+                 price: Union[int, float] = 0, availability: str = '', image: str = None,
+                 note: str = '', variants: Optional[List[Dict[str, Any]]] = None):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.size = size
+        self.price = price
+        self.availability = availability
+        self.image = image or f"{id}.jpg"  # Default to jpg
+        self.note = note
+        self.variants = variants
+
+    @classmethod
+    def from_row(cls, row: List[Any], columns: Dict[str, int]) -> Optional['Product']:
+        """Build a product from one typed sheet row, or return None for rows without an id"""
+        def cell(field):
+            index = columns.get(field)
+            return row[index] if index is not None and index < len(row) else ''
+
+        product_id = cell_text(cell('id'))
+        if not product_id:
+            return None
+
+        return cls(
+            id=product_id,
+            name=cell_text(cell('name')),
+            category=cell_text(cell('category')),
+            size=cell_text(cell('size')),
+            price=parse_price(cell('price')),
+            availability=cell_text(cell('availability')),
+            note=cell_text(cell('note'))
+        )
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Dict-style read access, as used by the renderers in prerender.py"""
+        value = getattr(self, field, None) if field in self.__slots__ else None
+        return default if value is None else value
+
+    def row_hash(self) -> str:
+        """Short hash of the fields that come from the sheet row"""
+        text = json.dumps([getattr(self, field) for field in ROW_FIELDS], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the products.json representation"""
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'category': self.category,
+            'size': self.size,
+            'price': self.price,
+            'availability': self.availability,
+            'image': self.image,
+            'note': self.note
+        }
+        if self.variants:
+            data['variants'] = self.variants
+        return data
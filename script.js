@@ -1,9 +1,43 @@
 // Om Handicraft Website JavaScript
+
+// Rendered width of a product image at each breakpoint of the products grid
+const PRODUCT_IMAGE_SIZES = '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw';
+
+// Catalogs larger than this are rendered in windowed mode: cards are added in
+// batches while scrolling and only a bounded number are kept in the DOM
+const WINDOWED_RENDER_THRESHOLD = 300;
+const WINDOW_BATCH_SIZE = 24;   // multiple of every grid column count (1-4)
+const WINDOW_MAX_CARDS = 120;   // multiple of WINDOW_BATCH_SIZE
+
+// Placeholder shown when a product image fails to load
+const IMAGE_NOT_FOUND = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjNmNGY2Ii8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5YTNhZiIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPkltYWdlIG5vdCBmb3VuZDwvdGV4dD48L3N2Zz4=';
+
 class OmHandicraft {
     constructor() {
         this.products = [];
         this.categories = [];
         this.currentCategory = 'all';
+        // Per-category shard URLs from data/catalog.json (null when not sharded)
+        this.shardUrls = null;
+        this.productsByCategory = {};
+        this.shardRequests = {};
+        // Card element per product id; cards are created once and then shown or hidden
+        this.cards = new Map();
+        this.visibleIds = new Set();
+        this.cardsProducts = null;
+        // Scroll window over the filtered products (windowed mode only)
+        this.windowState = null;
+        // Search index from data/search-index.json, loaded on first focus of the search box
+        this.searchIndex = null;
+        this.searchIndexRequest = null;
+        this.searchQuery = '';
+        this.searchMatches = null;
+        this.productById = new Map();
+        this.productByIdSource = null;
+        this.cardTemplate = document.getElementById('product-card-template');
+        this.setupCardListeners();
+        // True while #products-container still holds the grid prerendered into index.html
+        this.prerendered = this.adoptPrerenderedCards();
         this.init();
     }
 
@@ -11,13 +45,25 @@ class OmHandicraft {
         await this.loadProducts();
         this.setupEventListeners();
         this.renderCategories();
-        this.renderProducts();
+        await this.showCategory(this.currentCategory);
     }
 
     async loadProducts() {
         try {
-            // In production, this would fetch from your generated data file
-            // For now, using sample data
+            // The catalog manifest lists categories and their shards;
+            // the shards themselves are fetched on demand
+            const catalogResponse = await fetch('data/catalog.json');
+            if (catalogResponse.ok) {
+                const catalog = await catalogResponse.json();
+                this.categories = catalog.categories.map(category => category.name);
+                this.shardUrls = {};
+                catalog.categories.forEach(category => {
+                    this.shardUrls[category.name] = category.shard;
+                });
+                return;
+            }
+
+            // Fall back to the full products file
             const response = await fetch('data/products.json');
             if (response.ok) {
                 const data = await response.json();
@@ -33,6 +79,49 @@ class OmHandicraft {
         }
     }
 
+    loadShard(category) {
+        if (!this.shardUrls || !(category in this.shardUrls)) {
+            return Promise.resolve();
+        }
+
+        if (!this.shardRequests[category]) {
+            this.shardRequests[category] = fetch(this.shardUrls[category])
+                .then(response => response.ok ? response.json() : { products: [] })
+                .catch(() => ({ products: [] }))
+                .then(shard => {
+                    this.productsByCategory[category] = shard.products || [];
+                    // Keep products in catalog order regardless of arrival order
+                    this.products = this.categories.flatMap(name => this.productsByCategory[name] || []);
+                });
+        }
+        return this.shardRequests[category];
+    }
+
+    async showCategory(category) {
+        const categories = category === 'all' ? this.categories : [category];
+        const pending = categories.filter(name => !(name in this.productsByCategory));
+
+        if (this.prerendered) {
+            // The prerendered grid is already on screen; reconcile once all of its data is here
+            this.prerendered = false;
+            await Promise.all(pending.map(name => this.loadShard(name)));
+            this.renderProducts();
+            return;
+        }
+
+        if (pending.length === 0) {
+            this.renderProducts();
+            return;
+        }
+
+        // Paint as each shard arrives instead of waiting for all of them
+        await Promise.all(pending.map(name => this.loadShard(name).then(() => {
+            if (this.currentCategory === category) {
+                this.renderProducts();
+            }
+        })));
+    }
+
     loadSampleData() {
         this.products = [
             {
@@ -80,6 +169,47 @@ class OmHandicraft {
         this.categories = ['Pottery', 'Textiles', 'Woodwork'];
     }
 
+    adoptPrerenderedCards() {
+        const cards = document.querySelectorAll('#products-container .product-card[data-product-id]');
+        cards.forEach(card => {
+            this.cards.set(card.dataset.productId, card);
+            this.visibleIds.add(card.dataset.productId);
+
+            // Images that failed before this script was loaded
+            const image = card.querySelector('img');
+            if (image.complete && image.naturalWidth === 0) {
+                this.showImageFallback(image);
+            }
+        });
+        return cards.length > 0;
+    }
+
+    setupCardListeners() {
+        const container = document.getElementById('products-container');
+
+        // Order buttons and broken images are handled once for all cards
+        container.addEventListener('click', (e) => {
+            const button = e.target.closest('[data-action="order"]');
+            if (button) {
+                const card = button.closest('.product-card');
+                orderProduct(card.querySelector('[data-field="name"]').textContent,
+                             card.querySelector('[data-field="price"]').textContent);
+            }
+        });
+        container.addEventListener('error', (e) => {
+            if (e.target.tagName === 'IMG') {
+                this.showImageFallback(e.target);
+            }
+        }, true);
+    }
+
+    showImageFallback(image) {
+        image.parentNode.querySelectorAll('source').forEach(source => source.remove());
+        if (image.src !== IMAGE_NOT_FOUND) {
+            image.src = IMAGE_NOT_FOUND;
+        }
+    }
+
     setupEventListeners() {
         // Category filter buttons
         document.addEventListener('click', (e) => {
@@ -87,6 +217,59 @@ class OmHandicraft {
                 this.handleCategoryFilter(e.target);
             }
         });
+
+        // Search box
+        const search = document.getElementById('product-search');
+        if (search) {
+            search.addEventListener('focus', () => this.loadSearchIndex(), { once: true });
+            search.addEventListener('input', () => this.handleSearch(search.value));
+        }
+    }
+
+    loadSearchIndex() {
+        if (!this.searchIndexRequest) {
+            this.searchIndexRequest = fetch('data/search-index.json')
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null)
+                .then(index => {
+                    this.searchIndex = index;
+                });
+        }
+        return this.searchIndexRequest;
+    }
+
+    async handleSearch(query) {
+        this.searchQuery = query;
+        await this.loadSearchIndex();
+
+        // A newer keystroke may have been handled while the index was loading
+        if (this.searchQuery === query) {
+            this.searchMatches = this.searchProducts(query);
+            this.renderProducts();
+        }
+    }
+
+    searchProducts(query) {
+        // Same tokenization as the index built by sync_website.py
+        const index = this.searchIndex;
+        // Words shorter than the indexed prefixes are ignored
+        const words = (query.toLowerCase().match(/[\p{L}\p{N}]+/gu) || [])
+            .filter(word => index && word.length >= index.min_prefix);
+        if (!index || words.length === 0) {
+            return null;
+        }
+
+        // Every word is looked up as a token or prefix; intersect from the shortest list
+        const postings = words
+            // Own keys only, so words like "constructor" do not hit Object.prototype
+            .map(word => Object.hasOwn(index.terms, word) ? index.terms[word] : [])
+            // Indexes written before positions were encoded hold them as-is
+            .map(positions => index.postings === 'gap-runs' ? decodePositions(positions) : positions)
+            .sort((a, b) => a.length - b.length);
+        const others = postings.slice(1).map(positions => new Set(positions));
+        return postings[0]
+            .filter(position => others.every(set => set.has(position)))
+            .map(position => index.ids[position]);
     }
 
     handleCategoryFilter(button) {
@@ -101,14 +284,15 @@ class OmHandicraft {
         button.classList.remove('bg-white');
 
         this.currentCategory = button.dataset.category;
-        this.renderProducts();
+        this.showCategory(this.currentCategory);
     }
 
     renderCategories() {
         const container = document.querySelector('.flex.flex-wrap.gap-2.justify-center');
         
-        // Add category buttons
-        this.categories.forEach(category => {
+        // Add category buttons (skipping any prerendered into index.html)
+        const existing = new Set([...container.querySelectorAll('.category-filter')].map(btn => btn.dataset.category));
+        this.categories.filter(category => !existing.has(category)).forEach(category => {
             const button = document.createElement('button');
             button.className = 'category-filter px-6 py-3 rounded-full bg-white shadow-md hover:shadow-lg transition-all duration-300 hover-lift';
             button.dataset.category = category;
@@ -125,59 +309,271 @@ class OmHandicraft {
         // Hide loading
         loading.style.display = 'none';
 
-        // Filter products based on category
-        const filteredProducts = this.currentCategory === 'all' 
-            ? this.products 
-            : this.products.filter(product => product.category === this.currentCategory);
+        // Filter products based on category and search matches
+        const inCategory = product => this.currentCategory === 'all' || product.category === this.currentCategory;
+        let filteredProducts;
+        if (this.searchMatches) {
+            this.indexProducts();
+            filteredProducts = this.searchMatches
+                .map(id => this.productById.get(id))
+                .filter(product => product && inCategory(product));
+        } else {
+            filteredProducts = this.currentCategory === 'all' 
+                ? this.products 
+                : this.products.filter(inCategory);
+        }
+
+        if (this.products.length > WINDOWED_RENDER_THRESHOLD) {
+            emptyState.classList.toggle('hidden', filteredProducts.length > 0);
+            this.renderWindowed(container, filteredProducts);
+            return;
+        }
+
+        this.syncCards(container);
+        const nextIds = new Set(filteredProducts.map(product => product.id));
+
+        // Only touch the cards whose visibility changes
+        this.visibleIds.forEach(id => {
+            if (!nextIds.has(id)) {
+                this.cards.get(id).hidden = true;
+            }
+        });
+        nextIds.forEach(id => {
+            if (!this.visibleIds.has(id)) {
+                this.cards.get(id).hidden = false;
+            }
+        });
+        this.visibleIds = nextIds;
 
         // Show empty state if no products
-        if (filteredProducts.length === 0) {
-            emptyState.classList.remove('hidden');
-            container.innerHTML = '';
+        emptyState.classList.toggle('hidden', nextIds.size > 0);
+    }
+
+    indexProducts() {
+        // Rebuilt only when the product list changes
+        if (this.productByIdSource !== this.products) {
+            this.productById = new Map(this.products.map(product => [product.id, product]));
+            this.productByIdSource = this.products;
+        }
+    }
+
+    syncCards(container) {
+        // Cards only need creating or moving when the product list itself changed
+        if (this.cardsProducts === this.products) {
+            return;
+        }
+
+        // Create cards for new products and keep all cards in catalog order
+        let cursor = container.firstElementChild;
+        this.products.forEach(product => {
+            let card = this.cards.get(product.id);
+            if (!card) {
+                card = this.createProductCard(product);
+                card.hidden = true;
+                this.cards.set(product.id, card);
+            }
+
+            if (card === cursor) {
+                cursor = cursor.nextElementSibling;
+            } else {
+                container.insertBefore(card, cursor);
+            }
+        });
+        this.cardsProducts = this.products;
+    }
+
+    renderWindowed(container, products) {
+        if (!this.windowState) {
+            this.enterWindowedMode(container);
+        }
+        const state = this.windowState;
+
+        // Stay at the same place when the current filter just got more data
+        const filterKey = `${this.currentCategory}\n${this.searchQuery}`;
+        const keepPosition = state.filterKey === filterKey && state.start < products.length;
+        const end = keepPosition ? Math.max(state.end, state.start + WINDOW_BATCH_SIZE) : WINDOW_BATCH_SIZE;
+        if (!keepPosition) {
+            state.start = 0;
+            this.setSpacerHeight(0);
+        }
+        state.filterKey = filterKey;
+        state.products = products;
+
+        // When more shards arrive, the live cards usually still show the same
+        // products at the same positions; keep them and only add the new range
+        const cards = this.windowCards();
+        const windowUnchanged = keepPosition &&
+            cards.every((card, index) => products[state.start + index]?.id === card.dataset.productId);
+        if (windowUnchanged) {
+            state.end = state.start + cards.length;
+        } else {
+            cards.forEach(card => card.remove());
+            state.end = state.start;
+        }
+        this.appendCards(Math.min(end, products.length));
+        this.observeWindowEdges();
+    }
+
+    enterWindowedMode(container) {
+        // Cards from keyed mode or the prerendered grid are replaced by the window
+        this.cards.forEach(card => card.remove());
+        this.cards.clear();
+        this.visibleIds.clear();
+
+        // The spacer stands in for cards dropped above the window; the sentinel
+        // marks its end. Both span the full grid row.
+        const spacer = document.createElement('div');
+        spacer.className = 'col-span-full';
+        const sentinel = document.createElement('div');
+        sentinel.className = 'col-span-full h-px';
+        container.prepend(spacer);
+        container.append(sentinel);
+
+        this.windowState = { products: [], filterKey: null, start: 0, end: 0, spacerHeight: 0, spacer, sentinel };
+        this.windowObserver = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (!entry.isIntersecting) {
+                    return;
+                }
+                if (entry.target === spacer) {
+                    this.prependBatch();
+                } else {
+                    this.appendBatch();
+                }
+            });
+        }, { rootMargin: '800px 0px' });
+    }
+
+    windowCards() {
+        return [...this.windowState.spacer.parentNode.querySelectorAll(':scope > .product-card')];
+    }
+
+    setSpacerHeight(height) {
+        this.windowState.spacerHeight = height;
+        this.windowState.spacer.style.height = `${height}px`;
+    }
+
+    observeWindowEdges() {
+        // Re-observing fires a fresh callback if an edge is still in view
+        const { spacer, sentinel } = this.windowState;
+        [spacer, sentinel].forEach(edge => {
+            this.windowObserver.unobserve(edge);
+            this.windowObserver.observe(edge);
+        });
+    }
+
+    appendCards(end) {
+        const state = this.windowState;
+        const fragment = document.createDocumentFragment();
+        state.products.slice(state.end, end).forEach(product => fragment.append(this.createProductCard(product)));
+        state.sentinel.before(fragment);
+        state.end = end;
+    }
+
+    appendBatch() {
+        const state = this.windowState;
+        if (state.end >= state.products.length) {
             return;
         }
+        this.appendCards(Math.min(state.end + WINDOW_BATCH_SIZE, state.products.length));
+
+        // Drop cards far above the viewport, keeping their height in the spacer
+        const excess = state.end - state.start - WINDOW_MAX_CARDS;
+        if (excess > 0) {
+            const cards = this.windowCards();
+            const height = cards[excess].offsetTop - cards[0].offsetTop;
+            cards.slice(0, excess).forEach(card => card.remove());
+            state.start += excess;
+            this.setSpacerHeight(state.spacerHeight + height);
+        }
+        this.observeWindowEdges();
+    }
+
+    prependBatch() {
+        const state = this.windowState;
+        if (state.start === 0) {
+            return;
+        }
+        const start = Math.max(0, state.start - WINDOW_BATCH_SIZE);
+        const firstCard = this.windowCards()[0];
+
+        const fragment = document.createDocumentFragment();
+        const newCards = state.products.slice(start, state.start).map(product => this.createProductCard(product));
+        fragment.append(...newCards);
+        state.spacer.after(fragment);
+
+        // The restored cards take back their share of the spacer
+        const height = firstCard ? firstCard.offsetTop - newCards[0].offsetTop : 0;
+        state.start = start;
+        this.setSpacerHeight(start === 0 ? 0 : Math.max(0, state.spacerHeight - height));
+
+        // Drop cards far below the viewport
+        const excess = state.end - state.start - WINDOW_MAX_CARDS;
+        if (excess > 0) {
+            const cards = this.windowCards();
+            cards.slice(cards.length - excess).forEach(card => card.remove());
+            state.end -= excess;
+        }
+        this.observeWindowEdges();
+    }
 
-        // Hide empty state
-        emptyState.classList.add('hidden');
+    createImageSources(product) {
+        // Responsive variants generated by the sync, grouped by MIME type
+        const variants = product.variants || [];
+        const types = [...new Set(variants.map(variant => variant.type))];
 
-        // Render products
-        container.innerHTML = filteredProducts.map(product => this.createProductCard(product)).join('');
+        return types.map(type => {
+            const source = document.createElement('source');
+            source.type = type;
+            source.srcset = variants
+                .filter(variant => variant.type === type)
+                .map(variant => `images/${variant.src} ${variant.width}w`)
+                .join(', ');
+            source.sizes = PRODUCT_IMAGE_SIZES;
+            return source;
+        });
     }
 
     createProductCard(product) {
         const availabilityColor = product.availability === 'In Stock' ? 'text-green-600' : 
                                  product.availability === 'Limited Stock' ? 'text-yellow-600' : 'text-red-600';
 
-        return `
-            <div class="product-card bg-white rounded-xl shadow-lg hover:shadow-xl transition-all duration-300 hover-lift fade-in overflow-hidden">
-                <div class="relative">
-                    <img src="images/${product.image}" 
-                         alt="${product.name}" 
-                         class="w-full h-64 object-cover"
-                         onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjNmNGY2Ii8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5YTNhZiIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPkltYWdlIG5vdCBmb3VuZDwvdGV4dD48L3N2Zz4='">
-                    <div class="absolute top-4 right-4 flex flex-col gap-2">
-                        <span class="px-3 py-1 rounded-full text-sm font-medium ${availabilityColor} bg-white/90 backdrop-blur-sm">
-                            ${product.availability}
-                        </span>
-                        <button onclick="orderProduct('${product.name}', '${product.price}')" class="px-3 py-1 bg-gradient-to-r from-yellow-300 to-gray-300 hover:from-yellow-400 hover:to-gray-400 text-gray-800 text-xs font-semibold rounded-full transition-all duration-300 shadow-md hover:shadow-lg flex items-center space-x-1">
-                            <i class="fab fa-whatsapp text-xs"></i>
-                            <span>Order</span>
-                        </button>
-                    </div>
-                </div>
-                <div class="p-6">
-                    <h3 class="text-xl font-semibold text-gray-800 mb-2">${product.name}</h3>
-                    <div class="flex justify-between items-center mb-2">
-                        <span class="text-sm text-gray-600">Size: ${product.size}</span>
-                        <span class="text-2xl font-bold text-yellow-600">₹${product.price}</span>
-                    </div>
-                    <p class="text-gray-600 text-sm">${product.note}</p>
-                </div>
-            </div>
-        `;
+        // Markup comes from the shared <template> in index.html (also used by prerender.py)
+        const card = this.cardTemplate.content.firstElementChild.cloneNode(true);
+        card.dataset.productId = product.id;
+
+        const image = card.querySelector('[data-field="image"]');
+        image.before(...this.createImageSources(product));
+        image.alt = product.name;
+        image.src = `images/${product.image}`;
+
+        ['availability', 'name', 'size', 'price', 'note'].forEach(field => {
+            card.querySelector(`[data-field="${field}"]`).textContent = product[field] ?? '';
+        });
+        card.querySelector('[data-field="availability"]').classList.add(availabilityColor);
+
+        return card;
     }
 }
 
+// Search index positions are stored as gaps from the previous position,
+// with -n standing for n consecutive positions (see encode_positions in sync_website.py)
+function decodePositions(encoded) {
+    const positions = [];
+    let position = -1;
+    encoded.forEach(value => {
+        if (value < 0) {
+            for (let i = 0; i < -value; i++) {
+                positions.push(++position);
+            }
+        } else {
+            position += value;
+            positions.push(position);
+        }
+    });
+    return positions;
+}
+
 // Global function for order button clicks
 function orderProduct(productName, price) {
     // Get phone number from config (loaded dynamically)
@@ -201,3 +597,12 @@ function orderProduct(productName, price) {
 document.addEventListener('DOMContentLoaded', () => {
     new OmHandicraft();
 });
+
+// Cache the catalog and images for instant repeat visits (sw.js is generated by deploy.py)
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('sw.js').catch(() => {
+            console.log('Service worker not available');
+        });
+    });
+}
@@ -0,0 +1,115 @@
+// Om Handicraft Service Worker
+// Template filled in by deploy.py, which writes the result to deployment/sw.js
+
+const CACHE_VERSION = '__CACHE_VERSION__';
+const PRECACHE_URLS = __PRECACHE_URLS__;
+
+const PRECACHE = `omhandicraft-precache-${CACHE_VERSION}`;
+const CATALOG_CACHE = `omhandicraft-catalog-${CACHE_VERSION}`;
+// Not versioned: a catalog edit must not drop every cached image. Images are
+// revalidated or content-hashed, and the cache is LRU-bounded.
+const IMAGE_CACHE = 'omhandicraft-images';
+const CURRENT_CACHES = [PRECACHE, CATALOG_CACHE, IMAGE_CACHE];
+
+// Least recently used images are evicted beyond this many entries
+const MAX_IMAGE_ENTRIES = 200;
+
+// Content-addressed images (and their variants) are named after a hash of
+// their bytes, so a cached copy can never be stale
+const CONTENT_HASHED_IMAGE = /^[0-9a-f]{20}(-\d+w)?\.\w+$/;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(PRECACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    // Caches from older catalog versions (and old versioned image caches) are dropped
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(
+                names.filter(name => !CURRENT_CACHES.includes(name)).map(name => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+
+    const path = url.pathname.slice(new URL(self.registration.scope).pathname.length);
+    if (request.mode === 'navigate') {
+        event.respondWith(cacheFirst(PRECACHE, new Request('index.html')));
+    } else if (path.startsWith('data/') && path.endsWith('.json')) {
+        event.respondWith(staleWhileRevalidate(CATALOG_CACHE, request));
+    } else if (path.startsWith('images/')) {
+        // images/<product_id>.jpg keeps its URL when the photo is replaced in Drive
+        const name = path.slice(path.lastIndexOf('/') + 1);
+        event.respondWith(CONTENT_HASHED_IMAGE.test(name)
+            ? cacheFirstLru(IMAGE_CACHE, request)
+            : staleWhileRevalidate(IMAGE_CACHE, request, MAX_IMAGE_ENTRIES));
+    } else if (PRECACHE_URLS.includes(path)) {
+        event.respondWith(cacheFirst(PRECACHE, request));
+    }
+});
+
+async function cacheFirst(cacheName, request) {
+    const cached = await caches.match(request, { cacheName });
+    return cached || fetch(request);
+}
+
+async function staleWhileRevalidate(cacheName, request, maxEntries) {
+    const cache = await caches.open(cacheName);
+    // Fall back to the copy precached at install time
+    const cached = await cache.match(request) || await caches.match(request, { cacheName: PRECACHE });
+    const network = fetch(request)
+        .then(async response => {
+            if (response.ok) {
+                // Deleting first moves the entry to the end of the eviction order
+                await cache.delete(request);
+                await cache.put(request, response.clone());
+                if (maxEntries) {
+                    await trimCache(cache, maxEntries);
+                }
+            }
+            return response;
+        })
+        .catch(error => {
+            if (cached) {
+                return cached;
+            }
+            throw error;
+        });
+    return cached || network;
+}
+
+async function cacheFirstLru(cacheName, request) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    if (cached) {
+        // Re-insert so the entry becomes the most recently used
+        await cache.delete(request);
+        await cache.put(request, cached.clone());
+        return cached;
+    }
+
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+        await trimCache(cache, MAX_IMAGE_ENTRIES);
+    }
+    return response;
+}
+
+async function trimCache(cache, maxEntries) {
+    // Cache keys come back in insertion order, oldest first
+    const keys = await cache.keys();
+    await Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)));
+}
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Sync State Store for Om Handicraft
+
+A SQLite database (data/sync_state.db) that remembers, per product, what the
+last sync saw: a hash of its sheet row, its Drive image file id and
+checksum, and a hash of its derived assets (stored image name and responsive
+variants). Each sync compares the catalog against it to find what was
+added, updated or deleted, records those changes in a per-run change log,
+and uses the result to skip work for unchanged products.
+
+Usage:
+    python state_store.py              # changes in the last 5 syncs
+    python state_store.py --runs 20
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Set
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'data' / 'sync_state.db'
+
+CHANGE_ADDED = 'added'
+CHANGE_UPDATED = 'updated'
+CHANGE_DELETED = 'deleted'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    products INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    updated INTEGER NOT NULL,
+    deleted INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    row_hash TEXT NOT NULL,
+    image_file_id TEXT,
+    image_md5 TEXT,
+    assets_hash TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_changed_run INTEGER
+);
+CREATE TABLE IF NOT EXISTS categories (
+    name TEXT PRIMARY KEY,
+    ids_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    product_id TEXT NOT NULL,
+    change TEXT NOT NULL,
+    fields TEXT,
+    PRIMARY KEY (run_id, product_id)
+);
+"""
+
+
+def content_hash(data: Any) -> str:
+    """Short stable hash of JSON-serializable data"""
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class SyncStateStore:
+    """Per-product sync state and change log in SQLite"""
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH):
+        self.path = path
+        self.db = sqlite3.connect(str(path))
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def products(self) -> Dict[str, sqlite3.Row]:
+        """State of every product recorded by the last sync, by id"""
+        return {row['id']: row for row in self.db.execute('SELECT * FROM products')}
+
+    def category_hashes(self) -> Dict[str, str]:
+        """Hash of each category's ordered product ids, as recorded by the last sync"""
+        return {row['name']: row['ids_hash'] for row in self.db.execute('SELECT * FROM categories')}
+
+    def diff(self, states: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Compare current product states with the stored ones.
+
+        states maps product id to {'category', 'row_hash', 'image_file_id',
+        'image_md5', 'assets_hash'}. Returns the changed products by id as
+        {'change': CHANGE_*, 'category': ..., 'fields': [changed keys]};
+        unchanged products are left out.
+        """
+        stored = self.products()
+        changes = {}
+        for product_id, state in states.items():
+            previous = stored.get(product_id)
+            if previous is None:
+                changes[product_id] = {'change': CHANGE_ADDED, 'category': state['category'], 'fields': []}
+                continue
+            fields = [key for key, value in state.items() if previous[key] != value]
+            if fields:
+                changes[product_id] = {'change': CHANGE_UPDATED, 'category': state['category'], 'fields': fields}
+                if 'category' in fields:
+                    # The product left its old category too
+                    changes[product_id]['previous_category'] = previous['category']
+
+        for product_id, previous in stored.items():
+            if product_id not in states:
+                changes[product_id] = {'change': CHANGE_DELETED, 'category': previous['category'], 'fields': []}
+        return changes
+
+    def record_run(self, started_at: str, status: str, states: Dict[str, Dict[str, Any]],
+                   changes: Dict[str, Dict[str, Any]], category_hashes: Dict[str, str]) -> int:
+        """Store the new product states and this run's change log in one transaction"""
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        counts = {kind: sum(1 for c in changes.values() if c['change'] == kind)
+                  for kind in (CHANGE_ADDED, CHANGE_UPDATED, CHANGE_DELETED)}
+
+        with self.db:
+            run_id = self.db.execute(
+                'INSERT INTO runs (started_at, finished_at, status, products, added, updated, deleted) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (started_at, now, status, len(states),
+                 counts[CHANGE_ADDED], counts[CHANGE_UPDATED], counts[CHANGE_DELETED])
+            ).lastrowid
+
+            self.db.executemany(
+                'INSERT INTO changes (run_id, product_id, change, fields) VALUES (?, ?, ?, ?)',
+                [(run_id, product_id, change['change'], ','.join(change['fields']) or None)
+                 for product_id, change in changes.items()]
+            )
+            self.db.executemany(
+                'DELETE FROM products WHERE id = ?',
+                [(product_id,) for product_id, change in changes.items() if change['change'] == CHANGE_DELETED]
+            )
+            self.db.executemany(
+                'INSERT INTO products (id, category, row_hash, image_file_id, image_md5, assets_hash, '
+                'first_seen, last_seen, last_changed_run) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET category = excluded.category, row_hash = excluded.row_hash, '
+                'image_file_id = excluded.image_file_id, image_md5 = excluded.image_md5, '
+                'assets_hash = excluded.assets_hash, last_seen = excluded.last_seen, '
+                'last_changed_run = COALESCE(excluded.last_changed_run, products.last_changed_run)',
+                [(product_id, state['category'], state['row_hash'], state['image_file_id'],
+                  state['image_md5'], state['assets_hash'], now, now,
+                  run_id if product_id in changes else None)
+                 for product_id, state in states.items()]
+            )
+            self.db.execute('DELETE FROM categories')
+            self.db.executemany('INSERT INTO categories (name, ids_hash) VALUES (?, ?)',
+                                sorted(category_hashes.items()))
+        return run_id
+
+    def recent_changes(self, runs: int = 5) -> List[Dict[str, Any]]:
+        """The last runs, newest first, each with the products it changed"""
+        recent = []
+        for run in self.db.execute('SELECT * FROM runs ORDER BY id DESC LIMIT ?', (runs,)).fetchall():
+            changes = self.db.execute(
+                'SELECT product_id, change, fields FROM changes WHERE run_id = ? ORDER BY change, product_id',
+                (run['id'],)
+            ).fetchall()
+            recent.append(dict(run, changes=[dict(change) for change in changes]))
+        return recent
+
+
+def changed_categories(changes: Dict[str, Dict[str, Any]]) -> Set[str]:
+    """Categories whose product lists are affected by changes"""
+    categories = set()
+    for change in changes.values():
+        categories.add(change['category'])
+        if change.get('previous_category') is not None:
+            categories.add(change['previous_category'])
+    return categories
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show what changed in recent website syncs")
+    parser.add_argument('--runs', type=int, default=5, help="number of recent syncs to show")
+    parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help="path of the sync state database")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"❌ No sync state database at {args.db}")
+        return
+
+    store = SyncStateStore(Path(args.db))
+    try:
+        runs = store.recent_changes(args.runs)
+    finally:
+        store.close()
+
+    if not runs:
+        print("ℹ️  No syncs recorded yet")
+    for run in runs:
+        print(f"\n🔄 Sync #{run['id']} at {run['finished_at']} ({run['status']}): {run['products']} products, "
+              f"{run['added']} added, {run['updated']} updated, {run['deleted']} deleted")
+        for change in run['changes']:
+            fields = f" ({change['fields']})" if change['fields'] else ''
+            print(f"   {change['change']:<8} {change['product_id']}{fields}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Sync Metrics for Om Handicraft
+
+Collects structured measurements during a sync_website.py run: how long
+each stage took, how many API calls were made, bytes downloaded, cache hits
+and failures. The sync writes them to data/sync_report.json and prints a
+short summary table at the end of the run.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator
+
+# Report format version, bumped when keys change meaning
+REPORT_VERSION = 1
+
+
+class SyncMetrics:
+    """Thread-safe stage timers and counters for one sync run"""
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block and add it to the named stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float):
+        """Add seconds to a stage (stages keep the order they first ran in)"""
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        """Increment a counter such as 'api.drive.files.list' or 'images.downloaded'"""
+        with self.lock:
+            self.counters[name] += amount
+
+    def report(self, status: str) -> Dict[str, Any]:
+        """Return the run's metrics as a JSON-serializable dict"""
+        with self.lock:
+            counters = dict(sorted(self.counters.items()))
+            return {
+                'report_version': REPORT_VERSION,
+                'status': status,
+                'started_at': self.started_at,
+                'total_seconds': round(time.perf_counter() - self.started, 3),
+                'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+                'api_calls': {name[len('api.'):]: count for name, count in counters.items()
+                              if name.startswith('api.')},
+                'counters': {name: count for name, count in counters.items()
+                             if not name.startswith('api.')}
+            }
+
+    def summary_table(self, status: str) -> str:
+        """Format the report as a plain-text table for the workflow log"""
+        report = self.report(status)
+        lines = [f"{'stage':<20} {'seconds':>9}"]
+        lines += [f"{name:<20} {seconds:>9.2f}" for name, seconds in report['stages'].items()]
+        lines.append(f"{'total':<20} {report['total_seconds']:>9.2f}")
+
+        lines.append('')
+        lines.append(f"API calls: {sum(report['api_calls'].values())} "
+                     f"({', '.join(f'{name} {count}' for name, count in report['api_calls'].items()) or 'none'})")
+        for name, count in report['counters'].items():
+            lines.append(f"{name}: {count}")
+        return '\n'.join(lines)
@@ -7,6 +7,8 @@ to update the website automatically.
 
 Usage:
     python sync_website.py
+    python sync_website.py --watch    # keep running, applying Drive changes as they happen
+                                      # (and publishing them with sync.watch.publish_command)
 
 Requirements:
     - Google Sheets API credentials
@@ -15,18 +17,33 @@ Requirements:
 """
 
 import os
+import re
 import json
+import argparse
+import filecmp
+import shutil
+import hashlib
+import subprocess
 import logging
-from typing import List, Dict, Any
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Set
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Google API imports
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+# Google API clients (the Google libraries themselves are imported lazily)
+import google_apis
+from google_apis import ApiGateway, DEFAULT_MAX_RETRY_SECONDS, ServicePool, load_credentials
+
+from build_images import ImageVariantBuilder
+from drive_changes import DriveChangeFeed, DriveChanges
+from prerender import prerender_index
+from product import Product, column_map
+from state_store import SyncStateStore, changed_categories, content_hash
+from sync_metrics import SyncMetrics
 
 # Load environment variables
 load_dotenv()
@@ -35,22 +52,226 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Number of concurrent image downloads when not set in config.json
+DEFAULT_IMAGE_WORKERS = 8
+
+# Images are streamed from Drive in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Content-addressed images are named after this many hex digits of their SHA-256
+CONTENT_HASH_LENGTH = 20
+CONTENT_HASH_PATTERN = re.compile(r'[0-9a-f]{%d}' % CONTENT_HASH_LENGTH)
+
+# Products are read from this sheet in windows of sheet_page_rows rows
+SHEET_NAME = 'Sheet1'
+DEFAULT_SHEET_PAGE_ROWS = 5000
+
+# Drive metadata fetched for an image file (listing and per-file lookups)
+DRIVE_FILE_FIELDS = 'id, name, mimeType, md5Checksum, modifiedTime, size'
+
+# Fields covered by the client-side search index, and the shortest prefix indexed
+SEARCH_FIELDS = ['name', 'category', 'size', 'note']
+SEARCH_MIN_PREFIX = 2
+SEARCH_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Watch mode: seconds between change polls, quiet time before a rebuild, and
+# the longest a burst of edits can postpone it
+DEFAULT_WATCH_POLL_SECONDS = 60
+DEFAULT_WATCH_DEBOUNCE_SECONDS = 15
+DEFAULT_WATCH_MAX_DELAY_SECONDS = 300
+
+# Longest watch.publish_command may run before it counts as failed
+WATCH_PUBLISH_TIMEOUT_SECONDS = 600
+
+# Results of OmHandicraftSync.sync_website()
+SYNC_UPDATED = 'updated'
+SYNC_UNCHANGED = 'unchanged'
+SYNC_FAILED = 'failed'
+
+def dump_json(data: Any) -> str:
+    """Serialize data the same way every time (sorted keys, fixed indentation)"""
+    return json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False) + '\n'
+
+def write_text_if_changed(path: Path, text: str) -> bool:
+    """Atomically replace path with text unless it already holds exactly that text.
+
+    Returns True if the file was written.
+    """
+    data = text.encode('utf-8')
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return True
+
+def write_products_json_if_changed(path: Path, fields: Dict[str, Any], products: Iterable[Product]) -> bool:
+    """Write {**fields, 'products': [...]} exactly as dump_json() would, one product at a time.
+
+    The products are serialized straight into a temporary file instead of
+    being converted to dicts and joined into one string first. The file is
+    only replaced when the new content differs. Returns True if it was written.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.part')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            data = dict(fields, products=None)
+            f.write('{')
+            for position, key in enumerate(sorted(data)):
+                f.write(',\n  ' if position else '\n  ')
+                f.write(json.dumps(key, ensure_ascii=False) + ': ')
+                if key != 'products':
+                    f.write(json.dumps(data[key], indent=2, sort_keys=True, ensure_ascii=False).replace('\n', '\n  '))
+                    continue
+                
+                count = 0
+                for product in products:
+                    f.write(',\n    ' if count else '[\n    ')
+                    f.write(json.dumps(product.to_dict(), indent=2, sort_keys=True, ensure_ascii=False)
+                            .replace('\n', '\n    '))
+                    count += 1
+                f.write('\n  ]' if count else '[]')
+            f.write('\n}\n')
+        
+        if path.exists() and filecmp.cmp(tmp_name, path, shallow=False):
+            os.unlink(tmp_name)
+            return False
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return True
+
+def encode_positions(positions: Iterable[int]) -> List[int]:
+    """Encode sorted search index positions compactly.
+
+    Each position is written as its gap from the previous one (starting
+    from -1), and a run of n consecutive positions after the previous one
+    as -n. Terms shared by most of the catalog shrink to a few numbers.
+    """
+    encoded = []
+    previous = -1
+    for position in sorted(positions):
+        gap = position - previous
+        previous = position
+        if gap == 1 and encoded and encoded[-1] < 0:
+            encoded[-1] -= 1
+        elif gap == 1 and encoded and encoded[-1] == 1:
+            encoded[-1] = -2
+        else:
+            encoded.append(gap)
+    return encoded
+
+def catalog_version(products: Iterable[Product], categories: List[str]) -> str:
+    """Hash the products and categories into a short, stable catalog version.
+
+    Equivalent to hashing the compact sorted-key JSON of
+    {'categories': ..., 'products': [...]}, fed to the hash one product at a time.
+    """
+    sha256 = hashlib.sha256()
+    sha256.update(b'{"categories":')
+    sha256.update(json.dumps(categories, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    sha256.update(b',"products":[')
+    for position, product in enumerate(products):
+        if position:
+            sha256.update(b',')
+        sha256.update(json.dumps(product.to_dict(), sort_keys=True, ensure_ascii=False,
+                                 separators=(',', ':')).encode('utf-8'))
+    sha256.update(b']}')
+    return sha256.hexdigest()[:16]
+
+class HashingWriter:
+    """File wrapper that hashes everything written through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+    def hexdigest(self) -> str:
+        return self.sha256.hexdigest()
+
 class OmHandicraftSync:
-    def __init__(self):
+    def __init__(self, website_path: Path = None):
         self.sheets_service = None
         self.drive_service = None
-        self.website_path = Path(__file__).parent
+        self.credentials = None
+        self.service_pool = None
+        self._manifest_lock = threading.Lock()
+        self.drive_image_index = None
+        self._images_by_md5 = {}
+        self.website_path = Path(website_path) if website_path else Path(__file__).parent
         self.images_path = self.website_path / 'images'
         self.data_path = self.website_path / 'data'
+        self.image_manifest_path = self.data_path / 'image_manifest.json'
+        self.sync_state_path = self.data_path / 'sync_state.json'
+        self.sync_report_path = self.data_path / 'sync_report.json'
+        self.state_store_path = self.data_path / 'sync_state.db'
+        self.state_store = None
+        self.metrics = SyncMetrics()
+        # Catalog of the last completed sync, reused by watch mode
+        self.products = None
+        # Stages that hit an error this run (the source versions are then not recorded)
+        self.failed_stages = set()
         
         # Load configuration
         self.config = self.load_config()
         self.spreadsheet_id = self.config.get('google', {}).get('sheet_id')
         self.drive_folder_id = self.config.get('google', {}).get('drive_folder_id')
         
+        # Sync tuning (env vars override config.json)
+        sync_config = self.config.get('sync', {})
+        self.image_workers = int(os.getenv('SYNC_IMAGE_WORKERS') or
+                                 sync_config.get('image_workers', DEFAULT_IMAGE_WORKERS))
+        # Worker transports kept open; one per download worker unless configured
+        self.api_pool_size = int(sync_config.get('api_pool_size') or self.image_workers)
+        self.sheet_page_rows = int(sync_config.get('sheet_page_rows', DEFAULT_SHEET_PAGE_ROWS))
+        self.content_addressed_images = bool(sync_config.get('content_addressed_images', False))
+        self.responsive_images = sync_config.get('responsive_images', {})
+        self.force_sync = os.getenv('SYNC_FORCE', '').lower() in ('1', 'true', 'yes')
+        watch_config = sync_config.get('watch', {})
+        self.watch_poll_seconds = float(watch_config.get('poll_seconds', DEFAULT_WATCH_POLL_SECONDS))
+        self.watch_debounce_seconds = float(watch_config.get('debounce_seconds', DEFAULT_WATCH_DEBOUNCE_SECONDS))
+        self.watch_max_delay_seconds = float(watch_config.get('max_delay_seconds',
+                                                              DEFAULT_WATCH_MAX_DELAY_SECONDS))
+        # Command (string for the shell, or argument list) run in the website
+        # folder after each rebuild that changed files, to put them online
+        self.watch_publish_command = watch_config.get('publish_command')
+        self.unpublished = False
+        
+        # Every Sheets/Drive call goes through one rate-limited, retrying gateway
+        self.api = ApiGateway(sync_config.get('api_rate_limits'),
+                              sync_config.get('max_retry_seconds', DEFAULT_MAX_RETRY_SECONDS),
+                              self.metrics)
+        
         # Create directories if they don't exist
         self.images_path.mkdir(exist_ok=True)
         self.data_path.mkdir(exist_ok=True)
+        
+        # Drive metadata of the last downloaded image per product
+        self.image_manifest = self.load_image_manifest()
 
     def load_config(self):
         """Load configuration from config.json"""
@@ -68,111 +289,245 @@ class OmHandicraftSync:
                 }
             }
 
+    def load_image_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the image manifest written by the previous sync"""
+        try:
+            with open(self.image_manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not load image manifest, all images will be downloaded: {e}")
+            return {}
+
+    def save_image_manifest(self):
+        """Write the image manifest so the next sync can skip unchanged images"""
+        try:
+            write_text_if_changed(self.image_manifest_path, dump_json(self.image_manifest))
+        except Exception as e:
+            logger.error(f"Error saving image manifest: {e}")
+            self.failed_stages.add('download')
+
+    def load_sync_state(self) -> Dict[str, Any]:
+        """Load the source versions recorded by the last successful sync"""
+        try:
+            with open(self.sync_state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not load sync state, running a full sync: {e}")
+            return {}
+
+    def save_sync_state(self, state: Dict[str, Any]):
+        """Record source versions after a successful sync"""
+        try:
+            write_text_if_changed(self.sync_state_path, dump_json(state))
+        except Exception as e:
+            logger.error(f"Error saving sync state: {e}")
+
+    def save_sync_state_if_complete(self, state: Dict[str, Any]):
+        """Record source versions unless a stage failed, so the next run retries it in full"""
+        if self.failed_stages:
+            logger.warning(f"Not recording source versions after errors in: {', '.join(sorted(self.failed_stages))}; "
+                           f"the next sync will run in full")
+            return
+        self.save_sync_state(state)
+
+    def open_state_store(self):
+        """Open data/sync_state.db; without it every stage does its full work"""
+        try:
+            return SyncStateStore(self.state_store_path)
+        except Exception as e:
+            logger.warning(f"Could not open sync state database, running without it: {e}")
+            return None
+
+    def product_states(self, products: List[Product]) -> Dict[str, Dict[str, Any]]:
+        """Per-product state recorded in the sync state database"""
+        states = {}
+        for product in products:
+            entry = self.image_manifest.get(product.id, {})
+            states[product.id] = {
+                'category': product.category,
+                'row_hash': product.row_hash(),
+                'image_file_id': entry.get('file_id'),
+                'image_md5': entry.get('md5Checksum'),
+                'assets_hash': content_hash({'image': product.image, 'variants': product.variants})
+            }
+        return states
+
+    def unchanged_images(self, products: List[Product]) -> Set[str]:
+        """Stored image names whose Drive checksum matches the last recorded sync"""
+        if not self.state_store:
+            return set()
+        stored = self.state_store.products()
+        unchanged = set()
+        for product in products:
+            previous = stored.get(product.id)
+            md5 = self.image_manifest.get(product.id, {}).get('md5Checksum')
+            if previous and md5 and previous['image_md5'] == md5 and previous['assets_hash']:
+                unchanged.add(product.image)
+        return unchanged
+
     def authenticate_google_apis(self):
-        """Authenticate with Google APIs"""
+        """Authenticate with Google APIs.
+
+        Credentials are loaded once per process and shared by the Sheets and
+        Drive services and the worker transport pool; the time spent on imports, credentials and discovery
+        is logged as the cold start cost.
+        """
         try:
-            SCOPES = [
-                'https://www.googleapis.com/auth/spreadsheets.readonly',
-                'https://www.googleapis.com/auth/drive.readonly'
-            ]
-            
-            if os.getenv('GITHUB_ACTIONS'):
-                # GitHub Actions - use Service Account credentials from secrets
-                logger.info("Running in GitHub Actions - using service account credentials")
-                
-                # Get credentials from GitHub Secrets
-                credentials_json = os.getenv('GOOGLE_CREDENTIALS')
-                if not credentials_json:
-                    raise ValueError("GOOGLE_CREDENTIALS environment variable not set")
-                
-                # Parse the service account credentials JSON
-                import json
-                credentials_info = json.loads(credentials_json)
-                
-                # Create service account credentials
-                from google.oauth2 import service_account
-                creds = service_account.Credentials.from_service_account_info(
-                    credentials_info, scopes=SCOPES)
-                
-            else:
-                # Local development - use OAuth flow
-                creds = None
-                token_file = 'token.json'
-                
-                if os.path.exists(token_file):
-                    creds = Credentials.from_authorized_user_file(token_file, SCOPES)
-                
-                if not creds or not creds.valid:
-                    if creds and creds.expired and creds.refresh_token:
-                        creds.refresh(Request())
-                    else:
-                        flow = InstalledAppFlow.from_client_secrets_file(
-                            'credentials.json', SCOPES)
-                        creds = flow.run_local_server(port=0)
-                    
-                    with open(token_file, 'w') as token:
-                        token.write(creds.to_json())
-            
-            # Build services
-            self.sheets_service = build('sheets', 'v4', credentials=creds)
-            self.drive_service = build('drive', 'v3', credentials=creds)
-            
-            logger.info("Successfully authenticated with Google APIs")
+            started = time.perf_counter()
+            self.credentials = load_credentials()
+            
+            # Main-thread services get their own transports; download workers
+            # check transports out of the pool
+            if self.service_pool:
+                self.service_pool.close()
+            self.service_pool = ServicePool(self.credentials, self.api_pool_size)
+            self.sheets_service = self.service_pool.dedicated('sheets', 'v4')
+            self.drive_service = self.service_pool.dedicated('drive', 'v3')
+            
+            timings = ', '.join(f"{step} {seconds:.2f}s" for step, seconds in google_apis.startup_timings.items())
+            logger.info(f"Successfully authenticated with Google APIs in "
+                        f"{time.perf_counter() - started:.2f}s ({timings})")
             return True
             
         except Exception as e:
             logger.error(f"Authentication failed: {e}")
             return False
 
-    def get_products_from_sheets(self) -> List[Dict[str, Any]]:
+    def get_sheet_row_count(self) -> int:
+        """Return the number of rows in the product sheet's grid"""
+        with self.metrics.stage('sheet_fetch'):
+            result = self.api.execute('sheets.get', self.sheets_service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[SHEET_NAME],
+                fields="sheets(properties(title,gridProperties(rowCount)))"
+            ))
+        
+        for sheet in result.get('sheets', []):
+            properties = sheet.get('properties', {})
+            if properties.get('title') == SHEET_NAME:
+                return properties.get('gridProperties', {}).get('rowCount', 0)
+        return 0
+
+    def get_sheet_window(self, first_row: int, last_row: int) -> List[List[Any]]:
+        """Fetch rows first_row..last_row (transient errors are retried by the API gateway)"""
+        with self.metrics.stage('sheet_fetch'):
+            result = self.api.execute('sheets.values.get', self.sheets_service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"{SHEET_NAME}!A{first_row}:G{last_row}",
+                valueRenderOption='UNFORMATTED_VALUE'
+            ))
+        return result.get('values', [])
+
+    def iter_products_from_sheets(self, start_row: int = 2) -> Iterator[Product]:
+        """Yield products from Google Sheets, reading fixed-size row windows.
+
+        Only one window of rows is held in memory at a time. Cells are read
+        unformatted (numbers stay numbers) and columns are located through
+        the header row. Pass start_row to resume a read after a window that
+        kept failing.
+        """
+        if not self.sheets_service:
+            raise ValueError("Sheets service not initialized")
+        
+        if not self.spreadsheet_id:
+            raise ValueError("Google Sheet ID not configured")
+        
+        row_count = self.get_sheet_row_count()
+        header = self.get_sheet_window(1, 1)
+        columns = column_map(header[0] if header else [])
+        
+        for first_row in range(start_row, row_count + 1, self.sheet_page_rows):
+            last_row = min(first_row + self.sheet_page_rows - 1, row_count)
+            rows = self.get_sheet_window(first_row, last_row)
+            started = time.perf_counter()
+            products = [product for product in (Product.from_row(row, columns) for row in rows) if product]
+            self.metrics.add_time('parse', time.perf_counter() - started)
+            yield from products
+
+    def get_products_from_sheets(self) -> List[Product]:
         """Fetch products from Google Sheets"""
         try:
-            if not self.sheets_service:
-                raise ValueError("Sheets service not initialized")
-            
-            if not self.spreadsheet_id:
-                raise ValueError("Google Sheet ID not configured")
-            
-            range_name = 'Sheet1!A:G'  # Adjust range as needed
-            result = self.sheets_service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
-            
-            values = result.get('values', [])
-            if not values:
+            products = list(self.iter_products_from_sheets())
+            if not products:
                 logger.warning("No data found in Google Sheets")
                 return []
             
-            # Skip header row
-            headers = values[0]
-            products = []
-            
-            for row in values[1:]:
-                if len(row) >= 7:  # Ensure we have all required columns
-                    product = {
-                        'id': row[0],
-                        'name': row[1],
-                        'category': row[2],
-                        'size': row[3],
-                        'price': int(row[4]) if row[4].isdigit() else 0,
-                        'availability': row[5],
-                        'image': f"{row[0]}.jpg",  # Default to jpg
-                        'note': row[6] if len(row) > 6 else ''
-                    }
-                    products.append(product)
-            
             logger.info(f"Fetched {len(products)} products from Google Sheets")
             return products
             
-        except HttpError as e:
+        except google_apis.HttpError as e:
             logger.error(f"Error fetching from Google Sheets: {e}")
             return []
 
-    def get_sample_products(self) -> List[Dict[str, Any]]:
+    def get_source_versions(self) -> Dict[str, Any]:
+        """Fetch the Drive modifiedTime/version of the sheet and image folder.
+
+        Only Drive-side values are recorded (no local clock), so the state
+        file stays byte-identical until something changes in Drive.
+        """
+        if not self.drive_service:
+            raise ValueError("Drive service not initialized")
+        
+        versions = {}
+        sources = {'sheet': self.spreadsheet_id, 'image_folder': self.drive_folder_id}
+        for key, file_id in sources.items():
+            if not file_id:
+                continue
+            versions[key] = self.api.execute('drive.files.get', self.drive_service.files().get(
+                fileId=file_id,
+                fields="modifiedTime, version"
+            ))
+        
+        if self.drive_folder_id:
+            versions['images'] = self.get_image_folder_fingerprint()
+        return versions
+
+    def get_image_folder_fingerprint(self) -> Dict[str, Any]:
+        """Count and hash the image folder's files (one call per 1000 files).
+
+        Drive does not touch the folder itself when an image is edited in
+        place, trashed, deleted or moved in, so every file's id, checksum
+        and modifiedTime are hashed instead.
+        """
+        entries = []
+        page_token = None
+        while True:
+            results = self.api.execute('drive.files.list', self.drive_service.files().list(
+                q=f"'{self.drive_folder_id}' in parents and trashed = false",
+                fields="nextPageToken, files(id, md5Checksum, modifiedTime)",
+                pageSize=1000,
+                pageToken=page_token
+            ))
+            entries.extend(f"{f['id']}:{f.get('md5Checksum')}:{f.get('modifiedTime')}"
+                           for f in results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        digest = hashlib.sha256('\n'.join(sorted(entries)).encode('utf-8')).hexdigest()[:16]
+        return {'count': len(entries), 'fingerprint': digest}
+
+    def sources_changed(self, previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+        """Check whether the sheet or any image changed since the previous sync"""
+        if not previous:
+            return True
+        
+        for key, description in (('sheet', 'the sheet'), ('image_folder', 'the image folder'),
+                                 ('images', 'the images')):
+            if previous.get(key) != current.get(key):
+                logger.info(f"Google Drive reports a change to {description}")
+                return True
+        
+        return False
+
+    def get_sample_products(self) -> List[Product]:
         """Get sample products for testing"""
         return [
-            {
+            Product(**{
                 'id': 'pottery-001',
                 'name': 'Handmade Ceramic Bowl',
                 'category': 'Pottery',
@@ -181,8 +536,8 @@ class OmHandicraftSync:
                 'availability': 'In Stock',
                 'image': 'pottery-001.jpg',
                 'note': 'Beautiful handcrafted ceramic bowl perfect for serving'
-            },
-            {
+            }),
+            Product(**{
                 'id': 'pottery-002',
                 'name': 'Handmade Ceramic Bowl',
                 'category': 'Pottery',
@@ -191,8 +546,8 @@ class OmHandicraftSync:
                 'availability': 'In Stock',
                 'image': 'pottery-002.jpg',
                 'note': 'Beautiful handcrafted ceramic bowl perfect for serving'
-            },
-            {
+            }),
+            Product(**{
                 'id': 'wood-001',
                 'name': 'Carved Wooden Box',
                 'category': 'Woodwork',
@@ -201,107 +556,911 @@ class OmHandicraftSync:
                 'availability': 'Limited Stock',
                 'image': 'wood-001.jpg',
                 'note': 'Hand-carved wooden jewelry box with intricate details'
-            }
+            })
         ]
 
-    def get_categories_from_products(self, products: List[Dict[str, Any]]) -> List[str]:
+    def get_categories_from_products(self, products: List[Product]) -> List[str]:
         """Extract unique categories from products"""
-        categories = list(set(product['category'] for product in products))
+        categories = list(set(product.category for product in products))
         return sorted(categories)
 
-    def download_image_from_drive(self, product_id: str) -> bool:
+    def list_drive_images(self) -> Dict[str, Dict[str, Any]]:
+        """List the image folder once (all pages) and index files by name"""
+        if not self.drive_service:
+            raise ValueError("Drive service not initialized")
+        
+        if not self.drive_folder_id:
+            raise ValueError("Google Drive folder ID not configured")
+        
+        index = {}
+        stems = {}
+        page_token = None
+        while True:
+            results = self.api.execute('drive.files.list', self.drive_service.files().list(
+                q=f"'{self.drive_folder_id}' in parents and trashed = false",
+                fields=f"nextPageToken, files({DRIVE_FILE_FIELDS})",
+                pageSize=1000,
+                pageToken=page_token
+            ))
+            
+            for file_info in results.get('files', []):
+                # Keep the first file Drive returns for a name, like the old per-product query
+                index.setdefault(file_info['name'], file_info)
+                stems.setdefault(Path(file_info['name']).stem, file_info)
+            
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        # Images may be uploaded as "<product_id>" or "<product_id>.jpg"
+        for stem, file_info in stems.items():
+            index.setdefault(stem, file_info)
+        
+        logger.info(f"Indexed {len(stems)} files in the Google Drive image folder")
+        return index
+
+    def resolve_images(self, products: List[Product], report_orphans: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Match products to Drive files, reporting missing and orphaned images.
+
+        Orphans are only meaningful when products is the whole catalog, so
+        pass report_orphans=False when resolving a subset.
+        """
+        self.drive_image_index = self.list_drive_images()
+        
+        resolved = {}
+        missing = []
+        for product in products:
+            file_info = self.drive_image_index.get(product.id)
+            if file_info:
+                resolved[product.id] = file_info
+            else:
+                missing.append(product.id)
+        
+        used_file_ids = {file_info['id'] for file_info in resolved.values()}
+        orphaned = sorted({
+            file_info['name'] for file_info in self.drive_image_index.values()
+            if file_info['id'] not in used_file_ids
+        }) if report_orphans else []
+        
+        if missing:
+            logger.warning(f"{len(missing)} products have no image in Google Drive: {', '.join(missing)}")
+        if orphaned:
+            logger.warning(f"{len(orphaned)} Google Drive files match no product: {', '.join(orphaned)}")
+        
+        return resolved
+
+    def get_drive_metadata(self, file_ids: Dict[str, str],
+                           fields: str = DRIVE_FILE_FIELDS) -> Dict[str, Dict[str, Any]]:
+        """Fetch metadata for many Drive files using batch requests.
+
+        file_ids maps a key (usually a product id) to a Drive file id. Up to
+        BATCH_LIMIT lookups share one round trip; failed parts are retried
+        individually. Returns the metadata by key, leaving out files that
+        could not be fetched (deleted or inaccessible).
+        """
+        requests = {
+            key: self.drive_service.files().get(fileId=file_id, fields=fields)
+            for key, file_id in file_ids.items()
+        }
+        results, errors = self.api.execute_batch('drive.files.get', self.drive_service, requests)
+        for key, error in errors.items():
+            logger.warning(f"Could not fetch Drive metadata for {key} ({file_ids[key]}): {error}")
+        return results
+
+    def resolve_images_by_id(self, products: List[Product]) -> Dict[str, Dict[str, Any]]:
+        """Resolve images of known products by their stored Drive file id.
+
+        Meant for refreshing a few products: the file ids recorded in the
+        image manifest are looked up in batches instead of listing the whole
+        image folder. Products whose file is unknown, trashed, moved out of
+        the folder or renamed fall back to resolve_images().
+        """
+        known = {
+            product.id: self.image_manifest[product.id]['file_id']
+            for product in products
+            if self.image_manifest.get(product.id, {}).get('file_id')
+        }
+        metadata = self.get_drive_metadata(known, f"{DRIVE_FILE_FIELDS}, trashed, parents")
+        
+        resolved = {}
+        for product_id, file_info in metadata.items():
+            if (not file_info.get('trashed')
+                    and self.drive_folder_id in file_info.get('parents', [])
+                    and product_id in (file_info['name'], Path(file_info['name']).stem)):
+                resolved[product_id] = file_info
+        
+        unresolved = [product for product in products if product.id not in resolved]
+        if unresolved:
+            resolved.update(self.resolve_images(unresolved, report_orphans=False))
+        
+        logger.info(f"Resolved {len(resolved)} images, {len(metadata)} by file id")
+        return resolved
+
+    def image_is_current(self, product_id: str, cached: Dict[str, Any],
+                         remote: Dict[str, Any]) -> bool:
+        """Check whether the stored image still matches the Drive metadata"""
+        if not cached or any(cached.get(key) != value for key, value in remote.items()):
+            return False
+        
+        image = cached.get('image', f"{product_id}.jpg")
+        if self.content_addressed_images == (image == f"{product_id}.jpg"):
+            # Stored under the other naming mode
+            return False
+        return (self.images_path / image).exists()
+
+    def download_image_from_drive(self, product_id: str,
+                                  file_info: Dict[str, Any] = None) -> bool:
         """Download product image from Google Drive"""
         try:
             if not self.drive_service:
                 raise ValueError("Drive service not initialized")
             
-            if not self.drive_folder_id:
-                raise ValueError("Google Drive folder ID not configured")
-            
-            # Search for file in Google Drive
-            query = f"name='{product_id}' and parents in '{self.drive_folder_id}'"
-            results = self.drive_service.files().list(
-                q=query,
-                fields="files(id, name, mimeType)"
-            ).execute()
+            if file_info is None:
+                # Without a folder index, look the image up alone rather than listing the folder
+                if self.drive_image_index is None:
+                    file_info = self.resolve_images_by_id([Product(product_id)]).get(product_id)
+                else:
+                    file_info = self.drive_image_index.get(product_id)
             
-            files = results.get('files', [])
-            if not files:
+            if not file_info:
+                self.metrics.count('images.missing')
                 logger.warning(f"Image not found for product {product_id}")
                 return False
             
-            # Get the first matching file
-            file_info = files[0]
             file_id = file_info['id']
-            
-            # Download the file
-            request = self.drive_service.files().get_media(fileId=file_id)
             file_path = self.images_path / f"{product_id}.jpg"
             
-            with open(file_path, 'wb') as f:
-                f.write(request.execute())
+            remote = {
+                'file_id': file_id,
+                'md5Checksum': file_info.get('md5Checksum'),
+                'modifiedTime': file_info.get('modifiedTime'),
+                'size': file_info.get('size')
+            }
+            with self._manifest_lock:
+                cached = self.image_manifest.get(product_id)
+                # Identical bytes already stored for another product
+                shared_image = self._images_by_md5.get(remote['md5Checksum']) if remote['md5Checksum'] else None
+            if self.image_is_current(product_id, cached, remote):
+                self.register_image_md5(remote['md5Checksum'], cached.get('image', file_path.name))
+                self.metrics.count('images.unchanged')
+                logger.info(f"Image unchanged for product {product_id}, skipping download")
+                return True
+            
+            if shared_image and (self.images_path / shared_image).exists():
+                if self.content_addressed_images:
+                    image = shared_image
+                else:
+                    self.copy_image(self.images_path / shared_image, file_path)
+                    image = file_path.name
+                with self._manifest_lock:
+                    self.image_manifest[product_id] = dict(remote, image=image)
+                self.metrics.count('images.reused')
+                logger.info(f"Reusing stored image {shared_image} for product {product_id}")
+                return True
+            
+            # Download the file on a pooled transport, reusing its open connection
+            with self.service_pool.service('drive', 'v3') as drive_service:
+                request = drive_service.files().get_media(fileId=file_id)
+                stored_path = self.stream_download(request, file_path,
+                                                   content_addressed=self.content_addressed_images)
             
+            with self._manifest_lock:
+                self.image_manifest[product_id] = dict(remote, image=stored_path.name)
+            self.register_image_md5(remote['md5Checksum'], stored_path.name)
+            
+            self.metrics.count('images.downloaded')
             logger.info(f"Downloaded image for product {product_id}")
             return True
             
         except Exception as e:
+            self.metrics.count('images.failed')
             logger.error(f"Error downloading image for {product_id}: {e}")
+            self.failed_stages.add('download')
             return False
 
-    def update_products_json(self, products: List[Dict[str, Any]], categories: List[str]):
-        """Update the products.json file"""
+    def register_image_md5(self, md5: str, image: str):
+        """Remember a stored image so products with the same Drive checksum can reuse it"""
+        if md5:
+            with self._manifest_lock:
+                self._images_by_md5.setdefault(md5, image)
+
+    def copy_image(self, source: Path, file_path: Path):
+        """Copy a stored image to file_path, replacing it atomically"""
+        fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix='.part')
         try:
-            data = {
-                'products': products,
-                'categories': categories,
-                'last_updated': str(Path().cwd())  # Simple timestamp placeholder
-            }
+            with os.fdopen(fd, 'wb') as f, open(source, 'rb') as src:
+                shutil.copyfileobj(src, f)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, file_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def stream_download(self, request, file_path: Path, content_addressed: bool = False) -> Path:
+        """Stream a media request to file_path in chunks, replacing it atomically.
+
+        Bytes go to a temporary file in the same directory, which is renamed
+        over file_path only after the last chunk arrives, so a failed or
+        interrupted download never leaves a truncated image behind.
+
+        With content_addressed, the file is instead named after the SHA-256
+        of its contents (keeping file_path's suffix) and an existing file
+        with the same name is reused. Returns the path that was written.
+        """
+        from googleapiclient.http import MediaIoBaseDownload
+        
+        fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                writer = HashingWriter(f)
+                downloader = MediaIoBaseDownload(writer, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+                done = False
+                while not done:
+                    # Each chunk is its own HTTP request, so each goes through the gateway
+                    _, done = self.api.call('drive.files.get_media', downloader.next_chunk)
+                f.flush()
+                self.metrics.count('bytes_downloaded', writer.size)
+                os.fsync(f.fileno())
+            
+            if content_addressed:
+                file_path = file_path.with_name(
+                    writer.hexdigest()[:CONTENT_HASH_LENGTH] + file_path.suffix)
+                if file_path.exists():
+                    os.unlink(tmp_name)
+                    return file_path
+            
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, file_path)
+            return file_path
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def prune_images(self, products: List[Product]):
+        """Drop manifest entries for removed products and delete unreferenced hashed images.
+
+        Runs in both naming modes, so hashed files left over from running
+        with content_addressed_images are removed once it is turned off.
+        """
+        product_ids = {product.id for product in products}
+        for product_id in list(self.image_manifest):
+            if product_id not in product_ids:
+                del self.image_manifest[product_id]
+        
+        referenced = {entry.get('image') for entry in self.image_manifest.values()}
+        removed = 0
+        for path in self.images_path.iterdir():
+            if (path.is_file() and CONTENT_HASH_PATTERN.fullmatch(path.stem)
+                    and path.name not in referenced):
+                path.unlink()
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} unreferenced images")
+
+    def apply_image_names(self, products: List[Product]):
+        """Point each product's image field at its content-addressed file"""
+        for product in products:
+            entry = self.image_manifest.get(product.id)
+            if entry and entry.get('image'):
+                product.image = entry['image']
+
+    def download_images(self, products: List[Product], by_id: bool = False,
+                        known: Dict[str, Dict[str, Any]] = None) -> Dict[str, bool]:
+        """Download images for the given products using a bounded worker pool.
+
+        A full sync lists the image folder (one call per 1000 files). With
+        by_id, known images are instead looked up by file id in batches,
+        which is cheaper when only a few products are refreshed. known maps
+        product ids to Drive metadata that is already at hand (from the
+        changes feed) and needs no lookup.
+        """
+        results = {}
+        if not products:
+            return results
+        
+        try:
+            with self.metrics.stage('image_resolution'):
+                resolved = dict(known or {})
+                unresolved = [product for product in products if product.id not in resolved]
+                if unresolved:
+                    resolved.update(self.resolve_images_by_id(unresolved) if by_id
+                                    else self.resolve_images(unresolved))
+        except Exception as e:
+            logger.error(f"Error listing images in Google Drive: {e}")
+            self.failed_stages.add('image_resolution')
+            if self.content_addressed_images:
+                self.apply_image_names(products)
+            return {product.id: False for product in products}
+        
+        # Hashed files never change, so those stored by earlier runs can be
+        # shared; plain <product_id>.jpg files only once written this run
+        self._images_by_md5 = {
+            entry['md5Checksum']: entry['image']
+            for entry in self.image_manifest.values()
+            if entry.get('md5Checksum') and CONTENT_HASH_PATTERN.fullmatch(Path(entry.get('image', '')).stem)
+        } if self.content_addressed_images else {}
+        
+        # Products sharing a Drive checksum wait for the first of them, then reuse its file
+        first, duplicates = [], []
+        checksums = set()
+        for product in products:
+            md5 = resolved.get(product.id, {}).get('md5Checksum')
+            (duplicates if md5 and md5 in checksums else first).append(product)
+            if md5:
+                checksums.add(md5)
+        
+        workers = max(1, min(self.image_workers, len(products)))
+        with self.metrics.stage('download'), ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch in (first, duplicates):
+                futures = {
+                    executor.submit(self.download_image_from_drive, product.id,
+                                    resolved.get(product.id, {})): product.id
+                    for product in batch
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        
+        # Pruning needs the whole catalog, which a by-id refresh does not have
+        if not by_id:
+            self.prune_images(products)
+        if self.content_addressed_images:
+            self.apply_image_names(products)
+        
+        self.save_image_manifest()
+        
+        downloaded = sum(1 for ok in results.values() if ok)
+        logger.info(f"Synced {downloaded}/{len(results)} images using {workers} workers")
+        return results
+
+    def build_image_variants(self, products: List[Product]):
+        """Generate responsive image variants and record them on each product"""
+        if not self.responsive_images.get('enabled', True):
+            return
+        
+        try:
+            builder = ImageVariantBuilder(self.images_path, self.data_path / 'variant_manifest.json',
+                                          lambda path, data: write_text_if_changed(path, dump_json(data)),
+                                          self.responsive_images)
+            variants = builder.build([product.image for product in products],
+                                     trusted=self.unchanged_images(products))
+        except Exception as e:
+            logger.error(f"Error building responsive image variants: {e}")
+            self.failed_stages.add('variants')
+            return
+        
+        for product in products:
+            if variants.get(product.image):
+                product.variants = variants[product.image]
+
+    def update_products_json(self, products: List[Product], categories: List[str],
+                             changes: Dict[str, Dict[str, Any]] = None,
+                             category_hashes: Dict[str, str] = None):
+        """Update the products.json file.
+
+        The output is byte-stable for the same catalog: 'version' is a hash of
+        the products and categories, and the file (including 'last_updated')
+        is only rewritten when that version changes. Products are streamed
+        into the file, so the catalog is never held as a second copy of dicts
+        or as one big JSON string.
+
+        changes and category_hashes come from the sync state database and
+        let unchanged category shards be skipped; without them every file is
+        regenerated.
+        """
+        version = None
+        last_updated = None
+        try:
+            version = catalog_version(products, categories)
+            
+            # The small catalog manifest carries the same version/last_updated
+            # pair, so products.json does not have to be parsed to compare them
+            try:
+                with open(self.data_path / 'catalog.json', 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (FileNotFoundError, ValueError):
+                previous = {}
             
-            json_path = self.data_path / 'products.json'
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if previous.get('version') == version and previous.get('last_updated'):
+                last_updated = previous['last_updated']
+            else:
+                last_updated = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
             
-            logger.info(f"Updated products.json with {len(products)} products and {len(categories)} categories")
+            fields = {'categories': categories, 'version': version, 'last_updated': last_updated}
+            if write_products_json_if_changed(self.data_path / 'products.json', fields, products):
+                logger.info(f"Updated products.json with {len(products)} products and {len(categories)} categories")
+            else:
+                logger.info(f"products.json unchanged (version {version})")
             
         except Exception as e:
             logger.error(f"Error updating products.json: {e}")
+            self.failed_stages.add('write')
+        
+        self.update_catalog_shards(products, categories, version, last_updated, changes, category_hashes)
+        self.update_search_index(products, categories, version)
+
+    def update_catalog_shards(self, products: List[Product], categories: List[str],
+                              version: str = None, last_updated: str = None,
+                              changes: Dict[str, Dict[str, Any]] = None,
+                              category_hashes: Dict[str, str] = None):
+        """Write a small catalog manifest plus one products file per category.
 
-    def sync_website(self):
-        """Main sync function"""
-        logger.info("Starting website sync...")
+        The website loads data/catalog.json first and then only the shards
+        for the category being shown, so first paint does not depend on the
+        size of the whole catalog. A shard is not regenerated when none of
+        its products changed and its product list is the one recorded by the
+        last sync. SYNC_FORCE rewrites every shard.
+        """
+        try:
+            if changes is not None and self.state_store and not self.force_sync:
+                dirty = changed_categories(changes)
+                stored_hashes = self.state_store.category_hashes()
+            else:
+                dirty, stored_hashes = None, {}
+            
+
+            shards_path = self.data_path / 'categories'
+            shards_path.mkdir(exist_ok=True)
+            
+            by_category = {category: [] for category in categories}
+            for product in products:
+                by_category.setdefault(product.category, []).append(product)
+            
+            manifest_entries = []
+            written = set()
+            for category, category_products in by_category.items():
+                slug = re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-') or 'category'
+                filename = f"{slug}.json"
+                suffix = 2
+                while filename in written:
+                    filename = f"{slug}-{suffix}.json"
+                    suffix += 1
+                written.add(filename)
+                
+                unchanged = (dirty is not None and category not in dirty
+                             and category_hashes and stored_hashes.get(category) == category_hashes.get(category)
+                             and (shards_path / filename).exists())
+                if unchanged:
+                    self.metrics.count('shards.skipped')
+                else:
+                    write_products_json_if_changed(shards_path / filename, {'category': category},
+                                                   category_products)
+                
+                manifest_entries.append({
+                    'name': category,
+                    'count': len(category_products),
+                    'shard': f"data/categories/{filename}"
+                })
+            
+            # Remove shards of categories that no longer exist
+            for path in shards_path.glob('*.json'):
+                if path.name not in written:
+                    path.unlink()
+            
+            catalog = {
+                'categories': manifest_entries,
+                'total': len(products),
+                'version': version,
+                'last_updated': last_updated
+            }
+            if write_text_if_changed(self.data_path / 'catalog.json', dump_json(catalog)):
+                logger.info(f"Updated catalog.json with {len(manifest_entries)} category shards")
+            
+        except Exception as e:
+            logger.error(f"Error updating catalog shards: {e}")
+            self.failed_stages.add('write')
+
+    def update_search_index(self, products: List[Product], categories: List[str],
+                            version: str = None):
+        """Write data/search-index.json, an inverted index for the website's search box.
+
+        Every token of the searchable fields, and every prefix of it with at
+        least SEARCH_MIN_PREFIX characters, maps to the positions of matching
+        products in 'ids' (stored with encode_positions). Numbers (sizes, piece numbers) are only indexed
+        whole: their prefixes would add a term per digit for little use.
+        Products are listed in the same category-grouped order as the
+        website, so position order is display order.
+        """
+        try:
+            category_order = {category: index for index, category in enumerate(categories)}
+            ordered = sorted(products, key=lambda product: category_order.get(product.category, len(categories)))
+            
+            terms = {}
+            for position, product in enumerate(ordered):
+                text = ' '.join(str(product.get(field, '')) for field in SEARCH_FIELDS)
+                for token in set(SEARCH_TOKEN_PATTERN.findall(text.lower())):
+                    shortest = len(token) if token.isdigit() else min(SEARCH_MIN_PREFIX, len(token))
+                    for length in range(shortest, len(token) + 1):
+                        terms.setdefault(token[:length], set()).add(position)
+            
+            index = {
+                'version': version,
+                'min_prefix': SEARCH_MIN_PREFIX,
+                'postings': 'gap-runs',
+                'ids': [product.id for product in ordered],
+                'terms': {term: encode_positions(positions) for term, positions in sorted(terms.items())}
+            }
+            text = json.dumps(index, ensure_ascii=False, separators=(',', ':')) + '\n'
+            if write_text_if_changed(self.data_path / 'search-index.json', text):
+                logger.info(f"Updated search-index.json with {len(terms)} terms")
+            
+        except Exception as e:
+            logger.error(f"Error updating search index: {e}")
+            self.failed_stages.add('write')
+
+    def prerender_index_html(self, products: List[Product], categories: List[str]):
+        """Write the category buttons and the "All Items" grid into index.html"""
+        try:
+            index_path = self.website_path / 'index.html'
+            page = index_path.read_text(encoding='utf-8')
+            if write_text_if_changed(index_path, prerender_index(page, products, categories)):
+                logger.info(f"Prerendered {len(products)} products into index.html")
+        except Exception as e:
+            logger.error(f"Error prerendering index.html: {e}")
+            self.failed_stages.add('prerender')
+
+    def sync_website(self, changes: DriveChanges = None) -> str:
+        """Main sync function.
+
+        Returns SYNC_UPDATED, SYNC_UNCHANGED when neither the sheet nor the
+        image folder changed since the last successful run, or SYNC_FAILED.
+        With changes (from watch mode) only those are applied to the last
+        synced catalog. Every run, whatever its status, writes its metrics to
+        data/sync_report.json.
+        """
+        logger.info("Starting website sync..." if changes is None else
+                    f"Applying Drive changes to {changes.describe()}...")
+        self.metrics = SyncMetrics()
+        self.api.metrics = self.metrics
+        self.failed_stages = set()
         
-        # Authenticate
-        if not self.authenticate_google_apis():
+        status = SYNC_FAILED
+        self.state_store = self.open_state_store()
+        try:
+            status = self.run_sync_stages() if changes is None else self.run_change_stages(changes)
+        finally:
+            self.save_sync_report(status)
+            if self.state_store:
+                self.state_store.close()
+                self.state_store = None
+        return status
+
+    def run_sync_stages(self) -> str:
+        """Run the sync stages in order, timing each one"""
+        # Authenticate (watch mode keeps the services of its first sync)
+        with self.metrics.stage('auth'):
+            authenticated = self.drive_service is not None or self.authenticate_google_apis()
+        if not authenticated:
             logger.error("Authentication failed. Please check your credentials.")
-            return False
+            return SYNC_FAILED
+        
+        # Skip the full sync when nothing changed in Google Drive
+        try:
+            with self.metrics.stage('change_check'):
+                versions = self.get_source_versions()
+                changed = self.force_sync or self.sources_changed(self.load_sync_state(), versions)
+            if not changed:
+                logger.info("Sheet and images unchanged since the last sync, nothing to do")
+                return SYNC_UNCHANGED
+        except Exception as e:
+            logger.warning(f"Could not check for changes, running a full sync: {e}")
+            versions = None
         
-        # Get products from Google Sheets
+        # Get products from Google Sheets (timed as sheet_fetch and parse)
         products = self.get_products_from_sheets()
         if not products:
             logger.warning("No products found. Website will show empty state.")
-            return False
+            return SYNC_FAILED
+        self.metrics.count('products', len(products))
         
         # Get categories
         categories = self.get_categories_from_products(products)
         
-        # Download images
-        for product in products:
-            self.download_image_from_drive(product['id'])
+        # Download images (timed as image_resolution and download)
+        self.download_images(products)
         
-        # Update products.json
-        self.update_products_json(products, categories)
+        self.build_site(products, categories)
+        
+        if versions:
+            self.save_sync_state_if_complete(versions)
         
         logger.info("Website sync completed successfully!")
+        return SYNC_UPDATED
+
+    def run_change_stages(self, changes: DriveChanges) -> str:
+        """Apply sheet and image changes from the Drive changes feed.
+
+        The sheet is only read again when it changed, and images are only
+        fetched for products whose image file changed or that have none yet.
+        """
+        products = self.products
+        if changes.sheet or products is None:
+            products = self.get_products_from_sheets()
+            if not products:
+                logger.warning("No products found. Website will show empty state.")
+                return SYNC_FAILED
+        self.metrics.count('products', len(products))
+        categories = self.get_categories_from_products(products)
+        
+        affected, known = self.products_for_image_changes(products, changes.files)
+        # Products new to the catalog have no image yet
+        affected.update(product.id for product in products if product.id not in self.image_manifest)
+        self.download_images([product for product in products if product.id in affected],
+                             by_id=True, known=known)
+        if self.content_addressed_images:
+            self.apply_image_names(products)
+        
+        self.build_site(products, categories)
+        
+        # Keep the change check of the next scheduled sync in step
+        try:
+            self.save_sync_state_if_complete(self.get_source_versions())
+        except Exception as e:
+            logger.warning(f"Could not record source versions: {e}")
+        
+        logger.info(f"Applied Drive changes: {len(affected)} product images refreshed")
+        return SYNC_UPDATED
+
+    def products_for_image_changes(self, products: List[Product],
+                                   files: Dict[str, Dict[str, Any]]):
+        """Find the products affected by changed Drive image files.
+
+        Returns (product ids, Drive metadata by product id for files that can
+        be used as they are). A product whose file was deleted, trashed,
+        renamed or moved is affected but gets no metadata, so it is looked up
+        again.
+        """
+        product_ids = {product.id for product in products}
+        owners = {entry.get('file_id'): product_id for product_id, entry in self.image_manifest.items()}
+        
+        affected = set()
+        known = {}
+        for file_id, file_info in files.items():
+            if owners.get(file_id) in product_ids:
+                affected.add(owners[file_id])
+            if not file_info or file_info.get('trashed') or self.drive_folder_id not in file_info.get('parents', []):
+                continue
+            for name in (file_info['name'], Path(file_info['name']).stem):
+                if name in product_ids:
+                    affected.add(name)
+                    known.setdefault(name, file_info)
+        return affected, known
+
+    def build_site(self, products: List[Product], categories: List[str]):
+        """Build variants and write every generated file for the catalog"""
+        # Build responsive image variants
+        with self.metrics.stage('variants'):
+            self.build_image_variants(products)
+        
+        # Compare the catalog with the last recorded sync
+        states, changes, category_hashes = self.record_changes(products, categories)
+        
+        # Update products.json
+        with self.metrics.stage('write'):
+            self.update_products_json(products, categories, changes, category_hashes)
+        
+        # Prerender the product grid into index.html
+        with self.metrics.stage('prerender'):
+            self.prerender_index_html(products, categories)
+        
+        if changes is not None:
+            self.save_state_store(states, changes, category_hashes)
+        self.products = products
+
+    def watch(self, stop: threading.Event = None):
+        """Keep the website in sync by following the Drive changes feed.
+
+        Runs a normal sync first, then polls the feed every
+        watch.poll_seconds. Changes to the sheet or image folder are
+        collected until none arrived for watch.debounce_seconds (or
+        watch.max_delay_seconds passed since the first one), so a burst of
+        edits leads to a single rebuild. A sync that fails (for example
+        during a network outage) is retried after the next poll, keeping
+        the changes it was meant to apply. Runs until stop is set.
+
+        With watch.publish_command set, each rebuild that changed files is
+        published by running it, for example
+        "git add data/ images/ index.html && git commit -m 'Sync' && git push".
+        A failed publish is retried after every poll until it succeeds.
+        """
+        stop = stop or threading.Event()
+        if not self.authenticate_google_apis():
+            logger.error("Authentication failed. Please check your credentials.")
+            return
+        
+        # Take the cursor before the first sync, so edits made during it are not missed
+        feed = DriveChangeFeed(self.api, self.drive_service, self.spreadsheet_id, self.drive_folder_id,
+                               DRIVE_FILE_FIELDS)
+        while not stop.is_set():
+            try:
+                feed.start()
+                break
+            except Exception as e:
+                logger.error(f"Could not start following Drive changes: {e}")
+                stop.wait(self.watch_poll_seconds)
+        if stop.is_set():
+            return
+        synced = self.run_watch_sync()
+        
+        pending = DriveChanges()
+        first_seen = last_seen = None
+        retry_at = 0.0 if synced else time.monotonic() + self.watch_poll_seconds
+        while not stop.wait(self.watch_debounce_seconds if pending and synced else self.watch_poll_seconds):
+            try:
+                known_file_ids = {entry.get('file_id') for entry in self.image_manifest.values()}
+                changes = feed.poll(known_file_ids)
+            except Exception as e:
+                logger.warning(f"Could not read Drive changes, retrying at the next poll: {e}")
+                continue
+            
+            now = time.monotonic()
+            if changes:
+                logger.info(f"Google Drive reports changes to {changes.describe()}")
+                pending.merge(changes)
+                first_seen = first_seen or now
+                last_seen = now
+            
+            if self.unpublished:
+                self.publish_site()
+            
+            if now < retry_at:
+                continue
+            if not synced:
+                # Changes can only be applied on top of a completed full sync,
+                # which also covers the changes collected so far
+                synced = succeeded = self.run_watch_sync()
+            elif pending and (now - last_seen >= self.watch_debounce_seconds
+                              or now - first_seen >= self.watch_max_delay_seconds):
+                succeeded = self.run_watch_sync(pending)
+            else:
+                continue
+            
+            if succeeded:
+                pending = DriveChanges()
+                first_seen = last_seen = None
+            else:
+                retry_at = now + self.watch_poll_seconds
+
+    def run_watch_sync(self, changes: DriveChanges = None) -> bool:
+        """Run a full sync, or apply changes, for watch mode; returns whether it fully succeeded"""
+        try:
+            status = self.sync_website(changes)
+        except Exception as e:
+            logger.error(f"Sync failed, retrying after the next poll: {e}")
+            return False
+        if status == SYNC_FAILED or self.failed_stages:
+            logger.warning("Sync did not complete, retrying after the next poll")
+            return False
+        if status == SYNC_UPDATED and self.watch_publish_command:
+            self.unpublished = True
+            self.publish_site()
         return True
 
+    def publish_site(self) -> bool:
+        """Run watch.publish_command in the website folder; returns whether it succeeded"""
+        command = self.watch_publish_command
+        logger.info("Publishing the website...")
+        try:
+            result = subprocess.run(command, shell=isinstance(command, str), cwd=self.website_path,
+                                    capture_output=True, text=True, timeout=WATCH_PUBLISH_TIMEOUT_SECONDS)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.error(f"Publish command failed, retrying after the next poll: {e}")
+            return False
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).strip()
+            logger.error(f"Publish command exited with {result.returncode}, retrying after the next poll: {output}")
+            return False
+        
+        logger.info("Published the website")
+        self.unpublished = False
+        return True
+
+    def record_changes(self, products: List[Product], categories: List[str]):
+        """Diff the catalog against the sync state database.
+
+        Returns (states, changes, category_hashes); changes is None when the
+        database is unavailable.
+        """
+        states = self.product_states(products)
+        by_category = {category: [] for category in categories}
+        for product in products:
+            by_category.setdefault(product.category, []).append(product.id)
+        category_hashes = {category: content_hash(ids) for category, ids in by_category.items()}
+        
+        if not self.state_store:
+            return states, None, category_hashes
+        try:
+            with self.metrics.stage('change_log'):
+                changes = self.state_store.diff(states)
+        except Exception as e:
+            logger.warning(f"Could not read sync state database: {e}")
+            return states, None, category_hashes
+        
+        for kind in ('added', 'updated', 'deleted'):
+            count = sum(1 for change in changes.values() if change['change'] == kind)
+            self.metrics.count(f"changes.{kind}", count)
+        logger.info(f"{len(changes)} products changed since the last sync")
+        return states, changes, category_hashes
+
+    def save_state_store(self, states: Dict[str, Dict[str, Any]], changes: Dict[str, Dict[str, Any]],
+                         category_hashes: Dict[str, str]):
+        """Record this run's product states and change log, unless a stage failed.
+
+        Shards are skipped when the database says their products did not
+        change, so recording a run whose files were not all written would
+        leave those files stale.
+        """
+        if self.failed_stages:
+            logger.warning(f"Not recording this sync in {self.state_store_path.name} after errors in: "
+                           f"{', '.join(sorted(self.failed_stages))}")
+            return
+        try:
+            run_id = self.state_store.record_run(self.metrics.started_at, SYNC_UPDATED, states,
+                                                 changes, category_hashes)
+            logger.info(f"Recorded sync #{run_id} in {self.state_store_path.name}")
+        except Exception as e:
+            logger.error(f"Error saving sync state database: {e}")
+
+    def save_sync_report(self, status: str):
+        """Write this run's metrics to data/sync_report.json"""
+        if self.service_pool:
+            # Connection reuse of this run's transports
+            for name, value in self.service_pool.stats().items():
+                self.metrics.count(f"connections.{name}", value)
+        
+        try:
+            with open(self.sync_report_path, 'w', encoding='utf-8') as f:
+                f.write(dump_json(self.metrics.report(status)))
+        except Exception as e:
+            logger.error(f"Error saving sync report: {e}")
+
+def write_github_output(name: str, value: str):
+    """Expose a step output when running in GitHub Actions"""
+    output_path = os.getenv('GITHUB_OUTPUT')
+    if output_path:
+        with open(output_path, 'a') as f:
+            f.write(f"{name}={value}\n")
+
+def write_github_step_summary(text: str):
+    """Append markdown to the job summary when running in GitHub Actions"""
+    summary_path = os.getenv('GITHUB_STEP_SUMMARY')
+    if summary_path:
+        with open(summary_path, 'a', encoding='utf-8') as f:
+            f.write(text)
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Sync products from Google Sheets and images from Google Drive")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and apply sheet and image changes as they happen")
+    args = parser.parse_args()
+    
     sync = OmHandicraftSync()
-    success = sync.sync_website()
+    if args.watch:
+        print("👀 Watching Google Drive for changes (Ctrl+C to stop)...")
+        try:
+            sync.watch()
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        return
+    
+    status = sync.sync_website()
+    write_github_output('status', status)
+    
+    table = sync.metrics.summary_table(status)
+    print(f"\n📊 Sync metrics ({status}):\n{table}\n")
+    write_github_step_summary(f"### Sync metrics ({status})\n\n```\n{table}\n```\n")
     
-    if success:
+    if status == SYNC_UPDATED:
         print("✅ Website sync completed successfully!")
         print("🌐 Your website has been updated with the latest products.")
+    elif status == SYNC_UNCHANGED:
+        print("✅ No changes in Google Sheets or Drive since the last sync.")
     else:
         print("❌ Website sync failed. Please check the logs for details.")
         print("💡 Make sure your Google Sheets and Drive are properly configured.")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Product Parsing Tests for Om Handicraft
+
+Checks how sheet rows become Product fields: header matching in
+column_map and price cells in parse_price.
+
+Usage:
+    python -m unittest test_product
+"""
+
+import unittest
+
+from product import Product, DEFAULT_COLUMNS, column_map, parse_price
+
+
+class ParsePriceTest(unittest.TestCase):
+    def test_numbers(self):
+        self.assertEqual(parse_price(450), 450)
+        self.assertEqual(parse_price(450.0), 450)
+        self.assertEqual(parse_price(12.5), 12.5)
+        self.assertEqual(parse_price(True), 0)
+
+    def test_formatted_text(self):
+        cases = {
+            '450': 450,
+            '1,200': 1200,
+            '1,00,000': 100000,
+            '₹450.00': 450,
+            '₹ 1,250.50': 1250.5,
+            'Rs. 450': 450,
+            'Rs.1,200': 1200,
+            'INR 999/-': 999,
+        }
+        for text, price in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_price(text), price)
+
+    def test_range_uses_first_number(self):
+        self.assertEqual(parse_price('1200-1500'), 1200)
+        self.assertEqual(parse_price('Rs. 450 - 600'), 450)
+
+    def test_no_number(self):
+        for text in ('', 'on request', 'Rs.', '-'):
+            with self.subTest(text=text):
+                self.assertEqual(parse_price(text), 0)
+
+
+class ColumnMapTest(unittest.TestCase):
+    def test_documented_header(self):
+        header = ['product_id', 'name', 'category', 'size', 'price', 'availability', 'note']
+        self.assertEqual(column_map(header), DEFAULT_COLUMNS)
+
+    def test_reordered_header(self):
+        header = ['Name', 'Price', 'ID', 'Category', 'Notes', 'Size', 'Stock']
+        self.assertEqual(column_map(header), {
+            'name': 0, 'price': 1, 'id': 2, 'category': 3, 'note': 4, 'size': 5, 'availability': 6
+        })
+
+    def test_parenthesized_header(self):
+        header = ['Product ID', 'Product Name', 'Category', 'Size', 'Price (INR)', 'Availability', 'Note']
+        self.assertEqual(column_map(header)['price'], 4)
+
+    def test_unknown_header_keeps_default_position(self):
+        header = ['ID', 'Name', 'Category', 'Size', 'MRP', 'Availability', 'Remarks']
+        columns = column_map(header)
+        self.assertEqual(columns['price'], DEFAULT_COLUMNS['price'])
+        self.assertEqual(columns['note'], DEFAULT_COLUMNS['note'])
+
+    def test_default_position_taken_by_other_field(self):
+        # 'Notes' sits where price normally is, so price has no column
+        header = ['ID', 'Name', 'Category', 'Size', 'Notes']
+        columns = column_map(header)
+        self.assertEqual(columns['note'], 4)
+        self.assertNotIn('price', columns)
+
+    def test_no_header(self):
+        self.assertEqual(column_map([]), DEFAULT_COLUMNS)
+        self.assertEqual(column_map(['a', 'b', 'c']), DEFAULT_COLUMNS)
+
+    def test_row_read_through_map(self):
+        header = ['ID', 'Name', 'Category', 'Size', 'Price (INR)', 'Availability', 'Remarks']
+        row = ['pot-1', 'Vase', 'Pottery', '10 in', 'Rs.1,200', 'In Stock', 'Hand painted']
+        product = Product.from_row(row, column_map(header))
+        self.assertEqual(product.price, 1200)
+        self.assertEqual(product.note, 'Hand painted')
+
+
+if __name__ == "__main__":
+    unittest.main()
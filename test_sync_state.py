@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Sync State Tests for Om Handicraft
+
+Runs OmHandicraftSync against the offline server in fake_google.py and
+checks that category shards skipped through data/sync_state.db never stay
+stale: not after a sync whose writes failed, and not when SYNC_FORCE asks
+for a full rebuild.
+
+Usage:
+    python -m unittest test_sync_state
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fake_google import FakeCatalog, FakeGoogleServer, FAKE_SHEET_ID, FAKE_FOLDER_ID
+from test_watch import SITE_FILES
+
+
+@unittest.skipUnless(importlib.util.find_spec('googleapiclient'), "google-api-python-client not installed")
+class SyncStateTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer(FakeCatalog(30))
+        self.server.start()
+        self.website_path = Path(tempfile.mkdtemp(prefix='omhandicraft-state-'))
+
+        repo_path = Path(__file__).parent
+        for name in SITE_FILES:
+            shutil.copy(repo_path / name, self.website_path / name)
+        config_path = self.website_path / 'config.json'
+        config = json.loads(config_path.read_text(encoding='utf-8'))
+        config['google'] = {'sheet_id': FAKE_SHEET_ID, 'drive_folder_id': FAKE_FOLDER_ID}
+        config['sync'].update({'max_retry_seconds': 1, 'responsive_images': {'enabled': False}})
+        config_path.write_text(json.dumps(config, indent=2), encoding='utf-8')
+
+        self.environ = dict(os.environ)
+        os.environ['GOOGLE_API_ENDPOINT'] = self.server.endpoint
+        for name in ('GITHUB_ACTIONS', 'SYNC_FORCE'):
+            os.environ.pop(name, None)
+
+        from sync_website import OmHandicraftSync
+        self.sync = OmHandicraftSync(self.website_path)
+        self.assertEqual(self.sync.sync_website(), 'updated')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.website_path, ignore_errors=True)
+
+    def read_json(self, path: str):
+        return json.loads((self.website_path / path).read_text(encoding='utf-8'))
+
+    def shard_path(self, product_id: str) -> str:
+        """Path of the shard listing product_id, relative to the website"""
+        for entry in self.read_json('data/catalog.json')['categories']:
+            if any(product['id'] == product_id for product in self.read_json(entry['shard'])['products']):
+                return entry['shard']
+        self.fail(f"{product_id} is in no shard")
+
+    def shard_price(self, product_id: str):
+        products = self.read_json(self.shard_path(product_id))['products']
+        return next(product['price'] for product in products if product['id'] == product_id)
+
+    def test_shard_is_rewritten_after_failed_write(self):
+        shard = self.website_path / self.shard_path('pai-000005')
+        self.server.catalog.edit_row('pai-000005', 'Price', 99999)
+
+        import sync_website
+        write = sync_website.write_products_json_if_changed
+
+        def failing_shard_write(path, fields, products):
+            if path == shard:
+                raise OSError("disk full")
+            return write(path, fields, products)
+
+        with mock.patch('sync_website.write_products_json_if_changed', failing_shard_write):
+            self.sync.sync_website()
+        self.assertIn('write', self.sync.failed_stages)
+        self.assertNotEqual(self.shard_price('pai-000005'), 99999)
+
+        self.assertEqual(self.sync.sync_website(), 'updated')
+        self.assertFalse(self.sync.failed_stages)
+        products = {product['id']: product for product in self.read_json('data/products.json')['products']}
+        self.assertEqual(products['pai-000005']['price'], 99999)
+        self.assertEqual(self.shard_price('pai-000005'), 99999)
+
+    def test_forced_sync_rewrites_every_shard(self):
+        # A shard edited behind the database's back is only repaired by a forced run
+        shard = self.website_path / self.shard_path('pai-000005')
+        stale = self.read_json(self.shard_path('pai-000005'))
+        for product in stale['products']:
+            product['price'] = 1
+        shard.write_text(json.dumps(stale), encoding='utf-8')
+
+        self.sync.force_sync = True
+        self.sync.sync_website()
+        self.assertFalse(self.sync.failed_stages)
+        self.assertNotEqual(self.shard_price('pai-000005'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Watch Mode Tests for Om Handicraft
+
+Runs `sync_website.py --watch` (OmHandicraftSync.watch) in a thread against
+the offline server in fake_google.py, edits the fake catalog and checks
+that the edits reach the generated files.
+
+Usage:
+    python -m unittest test_watch
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from fake_google import FakeCatalog, FakeGoogleServer, FAKE_SHEET_ID, FAKE_FOLDER_ID
+
+# Files a sync reads from the website folder
+SITE_FILES = ['index.html', 'config.json']
+
+
+def wait_for(predicate, timeout: float = 20.0) -> bool:
+    """Poll predicate until it is true or timeout seconds passed"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+@unittest.skipUnless(importlib.util.find_spec('googleapiclient'), "google-api-python-client not installed")
+class WatchModeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeGoogleServer(FakeCatalog(30))
+        self.server.start()
+        self.website_path = Path(tempfile.mkdtemp(prefix='omhandicraft-watch-'))
+
+        repo_path = Path(__file__).parent
+        for name in SITE_FILES:
+            shutil.copy(repo_path / name, self.website_path / name)
+        config_path = self.website_path / 'config.json'
+        config = json.loads(config_path.read_text(encoding='utf-8'))
+        config['google'] = {'sheet_id': FAKE_SHEET_ID, 'drive_folder_id': FAKE_FOLDER_ID}
+        config['sync'].update({
+            'max_retry_seconds': 1,
+            'responsive_images': {'enabled': False},
+            'watch': {'poll_seconds': 0.2, 'debounce_seconds': 1, 'max_delay_seconds': 10}
+        })
+        config_path.write_text(json.dumps(config, indent=2), encoding='utf-8')
+
+        self.environ = dict(os.environ)
+        os.environ['GOOGLE_API_ENDPOINT'] = self.server.endpoint
+        for name in ('GITHUB_ACTIONS', 'SYNC_FORCE'):
+            os.environ.pop(name, None)
+
+        from sync_website import OmHandicraftSync
+        self.sync = OmHandicraftSync(self.website_path)
+        # Record every sync the watcher runs (None is a full sync)
+        self.runs = []
+        sync_website = self.sync.sync_website
+
+        def recorded_sync(changes=None):
+            status = sync_website(changes)
+            self.runs.append((changes, status))
+            return status
+
+        self.sync.sync_website = recorded_sync
+        self.stop = threading.Event()
+        self.watcher = threading.Thread(target=self.sync.watch, args=(self.stop,), daemon=True)
+
+    def tearDown(self):
+        self.stop.set()
+        self.watcher.join(timeout=30)
+        self.server.shutdown()
+        self.server.server_close()
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.website_path, ignore_errors=True)
+
+    def products(self):
+        text = (self.website_path / 'data' / 'products.json').read_text(encoding='utf-8')
+        return {product['id']: product for product in json.loads(text)['products']}
+
+    def test_burst_of_edits_is_applied_in_one_rebuild(self):
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: len(self.runs) == 1), "initial sync did not finish")
+        self.assertEqual(self.runs[0], (None, 'updated'))
+
+        catalog = self.server.catalog
+        catalog.edit_row('pai-000005', 'Price', 12345)
+        time.sleep(0.3)
+        catalog.replace_image('tex-000001')
+        time.sleep(0.3)
+        catalog.add_product('new-000001', 'Pottery')
+        catalog.delete_product('woo-000010')
+        catalog.touch_unrelated()
+
+        self.assertTrue(wait_for(lambda: len(self.runs) == 2), "changes were not applied")
+        # Quiet for a few debounce periods: no further rebuilds
+        time.sleep(3)
+        self.assertEqual(len(self.runs), 2)
+
+        changes, status = self.runs[1]
+        self.assertEqual(status, 'updated')
+        self.assertTrue(changes.sheet)
+        self.assertEqual(set(changes.files), {'file-tex-000001', 'file-new-000001', 'file-woo-000010'})
+
+        products = self.products()
+        self.assertEqual(products['pai-000005']['price'], 12345)
+        self.assertIn('new-000001', products)
+        self.assertNotIn('woo-000010', products)
+        for product_id in ('tex-000001', 'new-000001'):
+            content = (self.website_path / 'images' / f"{product_id}.jpg").read_bytes()
+            self.assertEqual(hashlib.md5(content).hexdigest(),
+                             catalog.files_by_id[f"file-{product_id}"]['md5Checksum'])
+
+    def test_failed_rebuild_is_retried(self):
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: len(self.runs) == 1), "initial sync did not finish")
+
+        # Polls keep working, but every sheet and image request fails
+        answer = self.server.RequestHandlerClass.answer
+
+        def outage(handler, target):
+            if '/changes' not in target:
+                return 503, {'error': {'code': 503, 'message': 'Backend Error'}}, {}
+            return answer(handler, target)
+
+        self.server.RequestHandlerClass.answer = outage
+        try:
+            self.server.catalog.edit_row('pai-000005', 'Price', 777)
+            self.assertTrue(wait_for(lambda: len(self.runs) >= 2), "rebuild was not attempted")
+        finally:
+            self.server.RequestHandlerClass.answer = answer
+        self.assertEqual(self.runs[1][1], 'failed')
+
+        self.assertTrue(wait_for(lambda: self.runs[-1][1] == 'updated' and len(self.runs) >= 3),
+                        "rebuild was not retried")
+        self.assertTrue(self.watcher.is_alive())
+        self.assertEqual(self.products()['pai-000005']['price'], 777)
+
+    def test_rebuild_error_does_not_stop_the_watcher(self):
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: len(self.runs) == 1), "initial sync did not finish")
+
+        # Like ApiGateway giving up on a connection error after its retry budget
+        get_products = self.sync.get_products_from_sheets
+        failures = []
+
+        def unreachable():
+            if not failures:
+                failures.append(True)
+                raise ConnectionError("network is unreachable")
+            return get_products()
+
+        self.sync.get_products_from_sheets = unreachable
+        self.server.catalog.edit_row('pai-000005', 'Price', 888)
+
+        self.assertTrue(wait_for(lambda: len(self.runs) >= 2), "changes were not applied")
+        self.assertTrue(failures)
+        self.assertTrue(self.watcher.is_alive())
+        self.assertEqual(self.runs[-1][1], 'updated')
+        self.assertEqual(self.products()['pai-000005']['price'], 888)
+
+    def test_rebuilds_are_published(self):
+        # Logs the published price of pai-000005; fails while publish-fails exists
+        script = ("import json, os, sys\n"
+                  "if os.path.exists('publish-fails'): sys.exit('remote rejected')\n"
+                  "products = json.load(open('data/products.json'))['products']\n"
+                  "price = next(p['price'] for p in products if p['id'] == 'pai-000005')\n"
+                  "open('published.log', 'a').write(f'{price}\\n')\n")
+        self.sync.watch_publish_command = [sys.executable, '-c', script]
+        published_log = self.website_path / 'published.log'
+
+        def published():
+            return published_log.read_text().split() if published_log.exists() else []
+
+        self.watcher.start()
+        self.assertTrue(wait_for(lambda: len(published()) == 1), "initial sync was not published")
+
+        (self.website_path / 'publish-fails').touch()
+        self.server.catalog.edit_row('pai-000005', 'Price', 4321)
+        self.assertTrue(wait_for(lambda: len(self.runs) == 2), "changes were not applied")
+        self.assertTrue(wait_for(lambda: self.sync.unpublished), "rebuild was not marked unpublished")
+        self.assertEqual(len(published()), 1)
+
+        (self.website_path / 'publish-fails').unlink()
+        self.assertTrue(wait_for(lambda: len(published()) == 2), "failed publish was not retried")
+        self.assertEqual(published()[-1], '4321')
+        self.assertEqual(len(self.runs), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()